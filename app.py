@@ -1,91 +1,114 @@
-import pandas as pd
 import streamlit as st
-from ipyvizzu import Chart, Data, Config, Style, DisplayTarget
-from ipyvizzustory import Story, Slide, Step
-from streamlit.components.v1 import html
-import ssl
 import os
-from streamlit_extras.stylable_container import stylable_container
+import logging
+import pandas as pd
+
+import calculator
+import ebf
+import export
+import figures
+import gdp
+import profiling
+import registry
+import store
 
 st.set_page_config(page_title="≠ growth", layout="centered")
 
-# Load data
-@st.cache_data
-def load_data():
-    """Load IL income inequality dataset."""
-    try:
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        csv_path = os.path.join(script_dir, "data_gdp.csv")
-        df = pd.read_csv(csv_path)
-        return df
-    except FileNotFoundError as e:
-        st.error(f"Data file not found: {e}. Please ensure the CSV files are in the correct location.")
-        return None
-    
-def main():    
-    # Load data
-    df = load_data()
-    
-    if df is None:
+# Load data. The datasets live in a process-wide registry (registry.py):
+# every rerun and session shares one frozen, memory-mapped copy, so modifying
+# a frame raises instead of leaking into other sessions. Serving through
+# ``python startup.py serve`` fills it (and the chart caches) at boot.
+
+@st.cache_resource(max_entries=1)
+def load_exports(source_signature, _frames):
+    """Pre-rendered chart HTML, or its URL under CHART_BASE_URL, for every current export."""
+    exported = export.current(_frames)
+    if export.BASE_URL:
+        return {name: export.BASE_URL + entry["html"] for name, entry in exported.items()}
+    pages = {}
+    for name, entry in exported.items():
+        with open(os.path.join(export.OUT_DIR, entry["html"]), encoding="utf-8") as f:
+            pages[name] = f.read()
+    return pages
+
+# The Tax the Rich calculator runs in the browser from a table of every
+# slider position's revenue, so dragging the slider never reruns anything.
+# Set CLIENT_CALCULATOR=0 to use a Streamlit slider that reruns the tab.
+CLIENT_CALCULATOR = os.environ.get("CLIENT_CALCULATOR") != "0"
+SLIDER_LABEL = "Adjust the rate from 0 to the wealth tax on the average Chicagoan"
+
+@st.cache_resource(max_entries=1)
+def calculator_widget(source_signature, _people):
+    """The browser-side calculator for the roster with the given signature."""
+    return calculator.widget(_people, SLIDER_LABEL)
+
+def show_chart(name, frames, exports, state=gdp.DEFAULT_STATE):
+    """Embed a story chart drawn from its frame in frames, from its static export when there is a current one."""
+    frame = frames[figures.SPEC["charts"][name]["frame"]]
+    if state != gdp.DEFAULT_STATE:
+        # Exports are drawn for the default state only
+        exports = {}
+    if export.BASE_URL and name in exports:
+        st.components.v1.iframe(exports[name], width=700, height=500, scrolling=False)
         return
-
-    tab1, tab2, tab3, tab4, tab5,tab6 = st.tabs(["Scarcity Myth", "Tax Burden Myth","Tax the Rich Calculator","Resources","Glossary", "EBF underfunding"])
-
-    with tab1:
-
-        # Format BEA data
-
-        df['year_type'] = df['year'].astype(str)
-        df['gdp_pct_100'] = df['gdp_pct']*100
-        df['gdp_pct_100'] = df['gdp_pct_100'].round(2)
-        df['gdp_pct_str'] = df['gdp_pct_100'].astype(str)+"%"
-        df['gdp_label'] = df['gdp'].apply(lambda x: f"${x/1000000:.1f}T" if x >= 1000000 else f"${x/1000:.1f}B")
-        df['gdp_label_total'] = df['total'].apply(lambda x: f"${x/1000000:.1f}T" if x >= 1000000 else f"${x/1000:.1f}B")
-        df['gdp'] = df['gdp']*1000000
-        df['total'] = df['total']*1000000
-
-        df['gdp_label'] = df.apply(lambda row: 
-            row['gdp_label'] if (row['year'] == 2005 or row['year'] == 2025)
-            else "", axis=1)
-
-        df['combined_label'] = df.apply(lambda row: 
-            row['gdp_label'] + " (" + row['gdp_pct_str'] + ")" if (row['year'] == 2005 or row['year'] == 2025)
-            else row['gdp_label'] if (row['year'] == 2005 or row['year'] == 2025)
-            else "", axis=1)
-
-        # create a data frame for state and local at 2005 gdp share 0.084394675
-
-        state_and_local = df.copy()
-        state_and_local = state_and_local[(state_and_local['type'] == 'State and Local Governments') & (state_and_local['quarter']=="Q1")]
-        state_and_local = state_and_local[['year','year_type','gdp']]
-        state_and_local['type'] = "GDP"
-        state_and_local_2005 = df.copy()
-        state_and_local_2005 = state_and_local_2005[(state_and_local_2005['type'] == 'Private Sector') & (state_and_local_2005['quarter']=="Q1")]
-        state_and_local_2005 = state_and_local_2005[['year','year_type','total']]
-        state_and_local_2005['gdp'] = state_and_local_2005['total'] * 0.084394675
-        state_and_local_2005 = state_and_local_2005[['year','year_type','gdp']]
-        state_and_local_2005['type'] = "GDP at 2005 level"
-
-        # concatenate state_and_local and state_and_local_2005
-
-        df2 = pd.concat([state_and_local,state_and_local_2005])
-
-        df2['gdp_label'] = df2['gdp'].apply(lambda x: f"${x/1000000000000:.1f}T" if x >= 1000000000000 else f"${x/1000000000:.1f}B")
-        df2['gdp_label'] = df2.apply(lambda row: 
-                row['gdp_label'] if (row['year'] == 2005 or row['year'] == 2025)
-                else "", axis=1)
-        # Main app
-
-        st.header("Illinois' Economic Resources and Who Captures Them")
-        st.markdown("""In this section we will:
+    with profiling.profile(f"chart {name}") as span:
+        html_content = exports.get(name) or figures.render(name, frame, state)
+        span.html_bytes = len(html_content.encode("utf-8"))
+    st.components.v1.html(html_content, width=700, height=500, scrolling=False)
+
+# Each tab is an st.fragment, so a widget inside one tab reruns only that
+# tab. Every run is profiled and logs one line with its duration: main() for
+# a full rerun, the tab that changed for a fragment rerun. With PROFILE=1 the
+# tabs, data loads and chart builds inside it are logged too (see profiling.py).
+logger = logging.getLogger("budget_myths")
+if not logger.handlers:
+    logger.addHandler(logging.StreamHandler())
+    logger.setLevel(logging.INFO)
+
+def timed(fn):
+    """Profile each run of fn as a span named after it."""
+    return profiling.profile(fn.__name__)(fn)
+
+def debug_panel():
+    """Sidebar table of where this run's time, memory and HTML bytes went (PROFILE=1 or ?profile)."""
+    spans = profiling.current()
+    with st.sidebar:
+        st.subheader("Profile")
+        st.caption(f"{len(spans)} spans, {sum(s['html_bytes'] or 0 for s in spans):,} HTML bytes"
+                   + ("" if profiling.ENABLED else "; set PROFILE=1 to trace allocations"))
+        table = pd.DataFrame(spans, columns=["name", "depth", "wall_ms", "peak_kb", "net_kb", "html_bytes"])
+        table["name"] = ["\u2003" * d + n for d, n in zip(table["depth"], table["name"])]
+        st.dataframe(table.drop(columns="depth"), hide_index=True)
+        datasets = pd.DataFrame(registry.DATASETS.stats(), columns=["dataset", "version", "bytes"])
+        st.caption(f"Shared datasets: {datasets['bytes'].sum():,} of {registry.DATASETS.budget:,} bytes")
+        st.dataframe(datasets.drop(columns="version"), hide_index=True)
+
+@st.fragment
+@timed
+def scarcity_myth(exports):
+    """Scarcity Myth tab: a state's GDP and the state and local share of it."""
+    # The charts can be drawn for any state with a GDP partition; only the
+    # selected state's frames are loaded
+    states = gdp.states()
+    state = gdp.DEFAULT_STATE
+    if len(states) > 1:
+        state = st.selectbox("State", states, index=states.index(gdp.DEFAULT_STATE))
+        if state != gdp.DEFAULT_STATE:
+            st.caption(f"The charts show {state}; the figures quoted in the text are for {gdp.DEFAULT_STATE}.")
+    frames = registry.gdp_frames(state)
+
+    # Main app
+
+    st.header("Illinois' Economic Resources and Who Captures Them")
+    st.markdown("""In this section we will:
 
 - Introduce the scarcity myth;
 - Illustrate why it's not true using government data;
 - Explore the distribution of economic resources in Illinois; and
 - Understand the implications of the scarcity myth""", unsafe_allow_html=True)
 
-        st.subheader("""The Scarcity Myth""")
-        st.markdown("""
+    st.subheader("""The Scarcity Myth""")
+    st.markdown("""
 A <b><mark style='background-color: yellow'>scarcity myth</mark></b> limits how the public imagines government budgets and how state and local leaders address deficits. This refers to <b><mark style='background-color: yellow'>the taken-for-granted belief that we simply don’t have the resources to fund public jobs, goods, and services. It operates by omitting the full picture of what our society produces and who owns it.</mark></b>
 
 For example, when budgets are discussed publicly the media, policy makers, and government officials often cite “rising expenditures” or “cost pressures” without answering an essential question: in relation to what?
@@ -96,285 +119,73 @@ Raising the question of what we have opens the door to questions of social justi
 
 """, unsafe_allow_html=True)
 
-        st.subheader("""The Private Sector Captures \\$9 Out of Every \\$10 of Illinois' Economic Output""")
-        st.markdown("""
+    st.subheader("""The Private Sector Captures \\$9 Out of Every \\$10 of Illinois' Economic Output""")
+    st.markdown("""
 One way to understand our resources (what we have) is by using a statistic called the <b><mark style='background-color: yellow'>gross domestic product</mark></b> (GDP). <b><mark style='background-color: yellow'>It measures the total value of all goods and services produced in any given boundary</mark></b>—in this case the state of Illinois.
 
 In March of 2025, Illinois’ economy generated $1.2 trillion.
 
 We can break this down to understand which industries are capturing this value. **The private sector captured 91% of Illinois’ economic resources. State and local governments expenditures accounted for less than 8%.**
 
-        """, unsafe_allow_html=True)
-
-
-            # Add restart button at the end
-        st.button("Show animation", key="restart_btn_1", type="primary")
-
-        # First chart section
-        data1 = Data()
-        data1.add_df(df, units={"gdp_pct_str": "%"})
-
-        # Create chart with responsive settings
-        chart1 = Chart(width="100%", height="400px", display=DisplayTarget.MANUAL)
-        chart1.animate(data1)
-
-        # Show total GDP
-        chart1.animate(
-            Data.filter("record['year'] == 2025 && record['quarter'] == 'Q1'"),
-            Config({
-                "y": "gdp",
-                "label": "gdp_label_total",
-                "title": "Illinois' GDP (March 2025)",
-                "legend": None
-            }),
-            Style({
-                "backgroundColor": "#ffffff00",
-                "plot": {
-                    "yAxis": {
-                        "color": "#CCCCCCFF",
-                        "label": {"numberScale": "K, M, B, T"},
-                        "title": {"color": "#ffffff00"},
-                        "interlacing": {"color": "#E6E6FA"}
-                    }
-                }
-            }),
-            delay=1,
-        )
+    """, unsafe_allow_html=True)
 
-        chart1.animate(
-            Data.filter("record['type'] != 'Federal Government' && record['year'] == 2025 && record['quarter'] == 'Q1'"),
-            Config({
-                "y": ["gdp","type"],
-                "label": "type",
-                "color":"type",
-                "title": "Illinois' GDP (March 2025)",
-                "legend": None
-            }),
-            Style({
-                "backgroundColor": "#ffffff00",
-                "plot": {
-                    "yAxis": {
-                        "color": "#CCCCCCFF",
-                        "label": {"numberScale": "K, M, B, T"},
-                        "title": {"color": "#ffffff00"},
-                        "interlacing": {"color": "#E6E6FA"}
-                    }
-                }
-            }),
-            delay=1,
-        )
+    # Render first chart
+    show_chart("gdp_share", frames, exports, state)
 
-        chart1.animate(
-            Data.filter("record['type'] != 'Federal Government' && record['year'] == 2025 && record['quarter'] == 'Q1'"),
-            Config({
-                "y": "gdp",
-                "x":"type",
-                "label": "combined_label",
-                "legend": None,
-                "color":"type",
-                "title": "Illinois GDP (March 2025)",
-            }),
-            Style({
-                "backgroundColor": "#ffffff00",
-                "plot": {
-                    "yAxis": {
-                        "color": "#CCCCCCFF",
-                        "label": {"numberScale": "K, M, B, T"},
-                        "title": {"color": "#ffffff00"},
-                        "interlacing": {"color": "#E6E6FA"}
-                    }
-                }
-            }),
-            delay=2,
-        )
+    st.subheader("""Illinois' Economy Is Growing, but the State and Local Government Share Is Shrinking""")
+    st.markdown("""
+    Illinois' economy doubled in size over the past 20 years. Large increases occurred post-Great Recession and again during and after the COVID pandic. 
 
-        # Render first chart
-        html_content1 = chart1._repr_html_()
-        st.components.v1.html(html_content1, width=700, height=450, scrolling=False)
-
-        st.subheader("""Illinois' Economy Is Growing, but the State and Local Government Share Is Shrinking""")
-        st.markdown("""
-        Illinois' economy doubled in size over the past 20 years. Large increases occurred post-Great Recession and again during and after the COVID pandic. 
-
-        The scarcity myth often implies that public sector expenditures are 'out of control'. However, the data suggests that this is not the case. **State and local governmental expenditures have accounted for a decreasing share of GDP over the last two decades.** 
-        """, unsafe_allow_html=True)
-
-        # Second chart section
-        data2 = Data()
-        data2.add_df(df, units={"gdp_pct_str": "%"})
-
-        # start animation button
-        st.button("Show Animation", key="restart_btn_2", type="primary")
-
-        # Create chart with responsive settings
-        chart2 = Chart(width="100%", height="400px", display=DisplayTarget.MANUAL)
-        chart2.animate(data2)
-
-        for i,y in enumerate(range(2005, 2026,5)):  # Changed to 2026 to include 2025
-           chart2.animate(
-               Data.filter(f"(record['year'] >= 2005 && record['year'] <= {y}) && record['type'] != 'Federal Government' && record['quarter'] == 'Q1'"),
-               Config({
-                   "x": ["year_type","type"],  # This creates side-by-side bars grouped by year and type
-                   "y": "gdp",
-                   "color": "type",
-                   "label": "gdp_label",
-                   "title": f"Illinois' GDP (2005-{y})",
-                   "subtitle": f"Private Industry vs State and Local Government",
-                   "legend": None
-               }),
-               Style({
-                "backgroundColor": "#ffffff00",
-                "plot": {
-                    "yAxis": {
-                        "color": "#CCCCCCFF",
-                        "label": {"numberScale": "K, M, B, T"},
-                        "title": {"color": "#ffffff00"},
-                        "interlacing": {"color": "#E6E6FA"}
-                    }
-                }
-                }),
-               x={"easing": "linear", "delay": 0},
-               y={"delay": 0},
-               show={"delay": 0},
-               hide={"delay": 0},
-               title={"duration": 0, "delay": 0},
-               duration=1,
-               delay=0.3,  # Faster animation for smoother progression
-           )
-
-        chart2.animate(
-               Data.filter(f"(record['year'] == 2005 || record['year'] == 2025) && record['type'] != 'Federal Government' && record['type'] != 'Private Industry' && record['quarter'] == 'Q1'"),
-               Config({
-                   "x": ["year_type", "type"],  # This creates side-by-side bars grouped by year and type
-                   "y": "gdp_pct_100",
-                   "color": "type",
-                   "label": "gdp_pct_str",
-                   "title": f"Illinois' GDP (2005 and 2025)",
-                   "subtitle": f"State and Local Governmental Share",
-                   "legend": None
-               }),
-               Style({
-                "backgroundColor": "#ffffff00",
-                "plot": {
-                    "yAxis": {
-                        "color": "#CCCCCCFF",
-                        "label": {"numberScale": "K, M, B, T"},
-                        "title": {"color": "#ffffff00"},
-                        "interlacing": {"color": "#E6E6FA"}
-                    }
-                }
-            }),
-               delay=.1,  # Faster animation for smoother progression
-           )
-
-        # Render second chart
-        html_content2 = chart2._repr_html_()
-        st.components.v1.html(html_content2, width=700, height=450, scrolling=False)
-
-        # Show what would happen if state and local share stayed at 2005 levels
-
-        st.subheader("""If the 2005 Share of the GDP Held, the State and Local Governments Would Have $12.2B More to Spend.""")
-        st.markdown("""
-
-        A 1 percent different when dealing with a trillion dollar economy amounts to a large sum of money. Had the 2005 share of GDP held, **the state and local governments' would have had over \\$12 billion more to spend in March of 2025.** That's enough to cover Trump's cuts to medicaid and the transit cliff while still having over $2 billion to spend.
-
-        This hypothetical points to an important consideration: the resources to fund public jobs and programs exist, its a matter how these resources are distributed or more importantly **how  that value is taxed and used by the public sector**. In the absence of tax revenue, budget cuts and borrowing from those with money *appears* to be the only feasible solution to our budget deficits. We will cover the topic of taxation in the following section. 
-
-        """, unsafe_allow_html=True)
-
-        data3 = Data()
-        data3.add_df(df2)
-
-        # start animation button
-        st.button("Show Animation", key="restart_btn_3", type="primary")
-
-        # Create chart with responsive settings
-        chart3 = Chart(width="100%", height="400px", display=DisplayTarget.MANUAL)
-        chart3.animate(data3)
-
-        for i,y in enumerate(range(2005, 2026,5)):  # Changed to 2026 to include 2025
-           chart3.animate(
-               Data.filter(f"(record['year'] >= 2005 && record['year'] <= {y})"),
-               Config({
-                   "x": ["year_type","type"],  # This creates side-by-side bars grouped by year and type
-                   "y": "gdp",
-                   "color": "type",
-                   "label": "gdp_label",
-                   "title": f"State and Local GDP (2005-{y})",
-                   "subtitle": f"Actual vs 2005 Share",
-                   "legend": None
-               }),
-               Style({
-                "backgroundColor": "#ffffff00",
-                "plot": {
-                    "yAxis": {
-                        "color": "#CCCCCCFF",
-                        "label": {"numberScale": "K, M, B, T"},
-                        "title": {"color": "#ffffff00"},
-                        "interlacing": {"color": "#E6E6FA"}
-                    }
-                }
-            }),
-               x={"easing": "linear", "delay": 0},
-               y={"delay": 0},
-               show={"delay": 0},
-               hide={"delay": 0},
-               title={"duration": 0, "delay": 0},
-               duration=1,
-               delay=0.3,  # Faster animation for smoother progression
-           )
-
-        chart3.animate(
-               Data.filter(f"(record['year'] == 2025)"),
-               Config({
-                   "x": ["year_type", "type"],  # This creates side-by-side bars grouped by year and type
-                   "y": "gdp",
-                   "color": "type",
-                   "label": "gdp_label",
-                   "title": f"State and Local GDP (2025)",
-                   "subtitle": f"Actual vs 2005 Share",
-                   "legend": None
-               }),
-               Style({
-                "backgroundColor": "#ffffff00",
-                "plot": {
-                    "yAxis": {
-                        "color": "#CCCCCCFF",
-                        "label": {"numberScale": "K, M, B, T"},
-                        "title": {"color": "#ffffff00"},
-                        "interlacing": {"color": "#E6E6FA"}
-                    }
-                }
-            }),
-               delay=.1,  # Faster animation for smoother progression
-           )
-
-        # Render second chart
-        html_content3 = chart3._repr_html_()
-        st.components.v1.html(html_content3, width=700, height=450, scrolling=False)
-
-        st.subheader("""Takeaways""")
-        st.markdown("""
-
-        - Scaricty is a myth used to justify cuts to the public sector or borrowing from the private sector to resolve budget deficits, which divert more tax dollars to interest and other forms of finance capital.
-        - There are enough economic resources to pay for and expand public sector jobs and programs.
-        - The private sector captures 91% of Illinois' economic resources. These resources have been increasingly privately owned over the past two decades while the state and local governments are losing their share.
-        - Had the 2005 share of GDP held, state and local governments' would have had over \\$12 billion more to spend in March of 2025.
-
-        """, unsafe_allow_html=True)
+    The scarcity myth often implies that public sector expenditures are 'out of control'. However, the data suggests that this is not the case. **State and local governmental expenditures have accounted for a decreasing share of GDP over the last two decades.** 
+    """, unsafe_allow_html=True)
 
-    with tab2:
-        st.header("Illinois' Budget Deficit and the Revenue Problem")
-        st.markdown("""In this section we will:
+    # Render second chart
+    show_chart("gdp_growth", frames, exports, state)
+
+    # Show what would happen if state and local share stayed at 2005 levels
+
+    st.subheader("""If the 2005 Share of the GDP Held, the State and Local Governments Would Have $12.2B More to Spend.""")
+    st.markdown("""
+
+    A 1 percent different when dealing with a trillion dollar economy amounts to a large sum of money. Had the 2005 share of GDP held, **the state and local governments' would have had over \\$12 billion more to spend in March of 2025.** That's enough to cover Trump's cuts to medicaid and the transit cliff while still having over $2 billion to spend.
+
+    This hypothetical points to an important consideration: the resources to fund public jobs and programs exist, its a matter how these resources are distributed or more importantly **how  that value is taxed and used by the public sector**. In the absence of tax revenue, budget cuts and borrowing from those with money *appears* to be the only feasible solution to our budget deficits. We will cover the topic of taxation in the following section. 
+
+    """, unsafe_allow_html=True)
+
+    # Render third chart
+    show_chart("state_local_2005", frames, exports, state)
+
+    st.subheader("""Takeaways""")
+    st.markdown("""
+
+    - Scaricty is a myth used to justify cuts to the public sector or borrowing from the private sector to resolve budget deficits, which divert more tax dollars to interest and other forms of finance capital.
+    - There are enough economic resources to pay for and expand public sector jobs and programs.
+    - The private sector captures 91% of Illinois' economic resources. These resources have been increasingly privately owned over the past two decades while the state and local governments are losing their share.
+    - Had the 2005 share of GDP held, state and local governments' would have had over \\$12 billion more to spend in March of 2025.
+
+    """, unsafe_allow_html=True)
+
+
+@st.fragment
+@timed
+def tax_burden_myth():
+    """Tax Burden Myth tab."""
+    # Imported here rather than at the top: only this tab uses it, and the
+    # tabs before it can be sent to the browser while it loads
+    from streamlit_extras.stylable_container import stylable_container
+
+    st.header("Illinois' Budget Deficit and the Revenue Problem")
+    st.markdown("""In this section we will:
 - Introduce the tax burden myth;
 - Discuss regressive taxation;
 - Illustrate how Illinois undertaxes it's economy using government data;
 - Explore how this relates to income and wealth inequality; and 
 - Discuss the effects of anti-tax austerity.
 """,unsafe_allow_html=True)
-        st.subheader("The Tax Burden Myth")
+    st.subheader("The Tax Burden Myth")
 
-        st.markdown("""
+    st.markdown("""
 The <b><mark style='background-color: yellow'>tax burden myth</mark></b> refers to <b><mark style='background-color: yellow'>the belief that the State of Illinois over taxes its residents and businesses. It operates by hiding growing income and wealth inequality and **who** and **what** our state actually taxes.</mark></b>
 
 For most of us, this myth might sound contrary to our lived experience--our homes are taxed, our groceries and clothes are taxed, we get stuck with a variety of fines and fees, and so on. The question is: how are we overtaxed if, as we showed in the scarcity myth, state and local government is capturing a shrinking share of economic growth? 
@@ -385,219 +196,139 @@ Illinois has a <b><mark style='background-color: yellow'>regressive tax system</
 
 """, unsafe_allow_html=True)
 
-        col1,col2 = st.columns([5,2])
-        with col1:
-            st.write("For example, in 1970 the State of Illinois' new constitution established a flat income tax, meaning that Illinois could not tax income on a graduated basis (where those with more pay more).")
-        with col2:
-            with stylable_container(
-                key="history_lesson",
-                css_styles="""
-                {
-                background-color: #CCCCFF;
-                border-radius: 10px;
-                padding: 10px;
-                align-items: left;
-                text-align: left;
-                }
-                .history-title {
-                text-align:center
-                }
-
-                """):
-                st.markdown("""<p class="history-title"><b>Brief History Lession</b></p>""",unsafe_allow_html=True)
-                st.markdown("""Some of the most important anti-tax measures in Illinois preceeded the famous Reagan era anti-tax movement. Illinois' 1970 Constitution institued a flat income tax and prevented City's from taxing income or the growing service economy.""",unsafe_allow_html=True)
+    col1,col2 = st.columns([5,2])
+    with col1:
+        st.write("For example, in 1970 the State of Illinois' new constitution established a flat income tax, meaning that Illinois could not tax income on a graduated basis (where those with more pay more).")
+    with col2:
+        with stylable_container(
+            key="history_lesson",
+            css_styles="""
+            {
+            background-color: #CCCCFF;
+            border-radius: 10px;
+            padding: 10px;
+            align-items: left;
+            text-align: left;
+            }
+            .history-title {
+            text-align:center
+            }
 
-    with tab3:
-        st.header("What If We Taxed Billionaire Wealth Like We Tax Working Class Wealth?")
+            """):
+            st.markdown("""<p class="history-title"><b>Brief History Lession</b></p>""",unsafe_allow_html=True)
+            st.markdown("""Some of the most important anti-tax measures in Illinois preceeded the famous Reagan era anti-tax movement. Illinois' 1970 Constitution institued a flat income tax and prevented City's from taxing income or the growing service economy.""",unsafe_allow_html=True)
 
-        st.markdown("""
+
+@st.fragment
+@timed
+def tax_the_rich_calculator(rosters):
+    """Tax the Rich Calculator tab: a wealth tax on IL billionaires."""
+    st.header("What If We Taxed Billionaire Wealth Like We Tax Working Class Wealth?")
+
+    st.markdown("""
 The property tax is one of the most hated taxes. For this reason, it's used as the poster child for the anti-tax movement. But it's worth considering why this is the case and what the property tax is. 
-        
+    
 The property tax is a wealth tax, but a very <b><mark style='background-color: yellow'>narrow-based</mark></b> wealth tax. That means <b><mark style='background-color: yellow'>it applies only to a very *narrow* subsection of a larger potential tax base</mark></b>—in this case, one type of nonfinancial asset, land and the built structure ontop of it (i.e. your home), versus a broader base of financial and non-financial assets. 
-        
+    
 Land and homes however are not the only form of wealth. More importantly, landed wealth make up a much smaller share of millionaires' and billionaires' net wealth comapred to the rest of us. 10% of their net wealth comes from real-estate; whereas, real-estate make up about 50% of net wealth of the bottom 50%. Conversely, Most (almost 2/3s) of the net wealth of millionaires' and billionaires' comes from corporate equities, mutual fund shares, and other financial assets. The property tax as it exists in Illinois is therefore regressive as it targets assets disproportionately held by those who are less wealthy.
 
 **What if we taxed millionaires and billionaires like the bottom 50%?**
 
-        """,unsafe_allow_html=True)
-
-        st.subheader("Apply a Wealth Tax on Illinois' Billionaires to See How Much Revenue Illinois Could Generate.")
-
-        tax_rate = st.slider("Adjust the rate from 0 to the wealth tax on the average Chicagoan", 0.000, 6.995, 1.000) / 100  # Convert to decimal
-        # 2024 Billionaire list
-        # billionaires = [
-        #     ("Lukas Walton", 40500000000),
-        #     ("Patrick Ryan", 13200000000),
-        #     ("Neil Bluhm", 7400000000),
-        #     ("Joe Mansueto", 6600000000),
-        #     ("Thomas Pritzker", 6400000000),
-        #     ("Mark Walter", 6100000000),
-        #     ("Ty Warner", 6000000000),
-        #     ("Elizabeth Uihlein", 5600000000),
-        #     ("Richard Uihlein", 5600000000),
-        #     ("Steve Lavin", 5400000000),
-        #     ("Eric Lefkofsky", 5200000000),
-        #     ("Sam Zell*", 5100000000),
-        #     ("Justin Ishbia", 4300000000),
-        #     ("Penny Pritzker", 4000000000),
-        #     ("Joseph Grendys", 4000000000),
-        #     ("Byron Trott", 3700000000),
-        #     ("J.B. Pritzker", 3700000000),
-        #     ("Josephine Louis*", 3200000000),
-        #     ("Oprah Winfrey", 3100000000),
-        #     ("Matthew Roszak", 2500000000),
-        #     ("Michael Polsky", 2500000000),
-        #     ("Jennifer Pritzker", 2500000000),
-        #     ("Steven Sarowitz", 2400000000),
-        #     ("Antonio Gracias", 2300000000),
-        #     ("Jerry Reinsdorf", 2300000000),
-        #     ("John Kapoor", 1800000000),
-        #     ("Don Levin", 1700000000),
-        #     ("Matthew Pritzker", 1700000000),
-        #     ("Bryan Glazer", 1700000000),
-        #     ("Brad Keywell", 1400000000),
-        #     ("Michael Krasny", 1300000000),
-        #     ("Blair Hull", 1000000000),
-        # ]
-
-        billionaires = [
-    ("Lukas Walton", 39800000000),
-    ("Patrick Ryan", 10000000000),
-    ("Neil Bluhm", 8700000000),
-    ("Mark Walter", 7300000000),
-    ("Ty Warner", 6500000000),
-    ("Steve Lavin & family", 6300000000),
-    ("Justin Ishbia", 6200000000),
-    ("Elizabeth Uihlein", 6200000000),
-    ("Richard Uihlein", 6200000000),
-    ("Eric Lefkofsky", 6000000000),
-    ("Joe Mansueto", 6000000000),
-    ("Thomas Pritzker", 5900000000),
-    ("Joseph Grendys", 5300000000),
-    ("Byron Trott", 4300000000),
-    ("Penny Pritzker", 4200000000),
-    ("J.B. Pritzker", 3900000000),
-]
+    """,unsafe_allow_html=True)
+
+    st.subheader("Apply a Wealth Tax on Illinois' Billionaires to See How Much Revenue Illinois Could Generate.")
+
+    if CLIENT_CALCULATOR:
+        people = calculator.roster(rosters)
+        st.components.v1.html(calculator_widget(store.signature(calculator.ROSTER_CSV), people), height=240 + 36 * len(people))
+    else:
+        lo, hi, step, default = calculator.SLIDER
+        tax_rate = st.slider(SLIDER_LABEL, lo, hi, default, step=step) / 100  # Convert to decimal
+        billionaires = calculator.breakdown(calculator.roster(rosters), tax_rate)
 
         st.markdown(f"### With a {tax_rate:.2%} tax rate on billionaires' wealth:")
 
-        total_wealth = sum(wealth for name, wealth in billionaires)
-        total_revenue = tax_rate * total_wealth
+        total_revenue = billionaires["revenue"].sum()
         st.markdown(f"<b><mark style='background-color: yellow'>The State of Illinois would generate ${total_revenue:,.0f} in revenue.</mark></b>",unsafe_allow_html=True)
 
+        st.dataframe(
+            billionaires.rename(columns={"name": "Billionaire", "wealth": "Net worth", "revenue": "Revenue"})
+                .style.format({"Net worth": "${:,.0f}", "Revenue": "${:,.0f}"}),
+            hide_index=True,
+        )
 
-        for name, wealth in billionaires:
-            revenue = tax_rate * wealth
-            st.markdown(f"- **{name}** would generate **${revenue:,.0f}** in revenue.")
-
-        st.subheader("""Takeaways""")
-        st.markdown("""
+    st.subheader("""Takeaways""")
+    st.markdown("""
 
 - The property tax in Illinois is a narrow based wealth tax meaning it only taxes land and the built structures on it (i.e. your home), which is a small subsection of wealth .
 - The property tax's narrowness makes it regressive, because it exclusively taxes wealth that is disproportionately owned by the bottom 50%.
 - If we taxed billionaires' wealth like we tax the average Chicagoan, Illinois could generate **$11.5 billion dollars!**
 
-        """, unsafe_allow_html=True)
+    """, unsafe_allow_html=True)
+
+
+@st.fragment
+@timed
+def resources():
+    """Resources tab."""
+    st.header("Resources")
+    st.write("IN PROGRESS")
+
+
+@st.fragment
+@timed
+def glossary():
+    """Glossary tab."""
+    st.header("Glossary")
+    st.write("IN PROGRESS")
+
+
+@st.fragment
+@timed
+def ebf_underfunding(data_melted, exports):
+    """EBF underfunding tab: Evidence-Based Funding for IL schools."""
+    st.subheader("Evidence-Based Funding Underfunding")
 
+    # Render fourth chart
+    show_chart("ebf_funding", {"ebf": data_melted}, exports)
+
+
+@timed
+def main():    
+    # Load data
+    try:
+        with profiling.profile("load data"):
+            frames = registry.gdp_frames()
+            ebf_frames = registry.ebf_frames()
+            rosters = registry.rosters()
+            exports = load_exports((store.signature(gdp.GDP_CSV), store.signature(ebf.EBF_CSV), export.signature()),
+                                   {**frames, **ebf_frames})
+    except FileNotFoundError as e:
+        st.error(f"Data file not found: {e}. Please ensure the CSV files are in the correct location.")
+        return
+
+    tab1, tab2, tab3, tab4, tab5,tab6 = st.tabs(["Scarcity Myth", "Tax Burden Myth","Tax the Rich Calculator","Resources","Glossary", "EBF underfunding"])
+
+    with tab1:
+        scarcity_myth(exports)
+
+    with tab2:
+        tax_burden_myth()
+
+    with tab3:
+        tax_the_rich_calculator(rosters)
 
     with tab4:
-        st.header("Resources")
-        st.write("IN PROGRESS")
+        resources()
 
     with tab5:
-        st.header("Glossary")
-        st.write("IN PROGRESS")
+        glossary()
 
     with tab6:
-        # Read in data
-
-        data = pd.read_csv("data_ebf.csv")
-
-        # Melt data so that Gap, Needed funding, and Actual funding are in one column
-        data_melted = data.melt(id_vars=["Year"], value_vars=["Gap", "Needed", "Actual"], var_name="Type", value_name="Amount")
-
-        # Make year_type column
-
-        data_melted['year_type'] = data_melted['Year'].astype(str)
-
-        # Make a string amount type in millions and billions
-        data_melted['Amount_str'] = data_melted['Amount'].apply(lambda x: f"${x/1000000000:.1f} B" if x >= 1000000000 else f"${x/1000000:.1f} M")
-        st.subheader("Evidence-Based Funding Underfunding")
-
-        data4 = Data()
-        data4.add_df(data_melted)
-        chart4 = Chart(width="100%", height="400px", display=DisplayTarget.MANUAL)
-        chart4.animate(data4)
-
-#        st.write(data4)
-
-        st.button("Replay Animation", key="restart_btn_4", type="primary")
-
-
-        for i,y in enumerate(range(2018, 2027,1)):
-           chart4.animate(
-               Data.filter(f"(record['Year'] >= 2018 && record['Year'] <= {y}) && record['Type'] != 'Actual'"),
-               Config({
-                   "x": ["year_type","Type"],  # This creates side-by-side bars grouped by year and type
-                   "y": "Amount",
-                   "color": "Type",
-                   "label": "Amount_str",
-                   "title": f"EBF Funding (2018-{y})",
-#                   "legend": None
-               }),
-               Style({
-                "backgroundColor": "#ffffff00",
-                "plot": {
-                    "yAxis": {
-                        "color": "#CCCCCCFF",
-                        "label": {"numberScale": "K, M, B, T"},
-                        "title": {"color": "#ffffff00"},
-                        "interlacing": {"color": "#E6E6FA"}
-                    }
-                }
-                }),
-               x={"easing": "linear", "delay": 0},
-               y={"delay": 0},
-               show={"delay": 0},
-               hide={"delay": 0},
-               title={"duration": 0, "delay": 0},
-               duration=1,
-               delay=.3,  # Faster animation for smoother progression
-           )
-        chart4.animate(
-            Data.filter(f"(record['Year'] >= 2018 && record['Year'] <= 2026) && record['Type'] != 'Gap'"),
-            Config({
-                "x": ["year_type","Type"],  # This creates side-by-side bars grouped by year and type
-                "y": "Amount",
-                "color": "Type",
-#                   "label": "Amount",
-                "title": f"EBF Funding (2018-{y})",
-#                   "legend": None
-            }),
-            Style({
-            "backgroundColor": "#ffffff00",
-            "plot": {
-                "yAxis": {
-                    "color": "#CCCCCCFF",
-                    "label": {"numberScale": "K, M, B, T"},
-                    "title": {"color": "#ffffff00"},
-                    "interlacing": {"color": "#E6E6FA"}
-                }
-            }
-            }),
-            x={"easing": "linear", "delay": 0},
-            y={"delay": 0},
-            show={"delay": 0},
-            hide={"delay": 0},
-            title={"duration": 0, "delay": 0},
-            duration=1,
-            delay=2,
-        )
-
-            # Render second chart
-        html_content4 = chart4._repr_html_()
-        st.components.v1.html(html_content4, width=700, height=450, scrolling=False)
+        ebf_underfunding(ebf_frames["ebf"], exports)
 
+    if profiling.ENABLED or "profile" in st.query_params:
+        debug_panel()
 
 
 if __name__ == "__main__":
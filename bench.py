@@ -0,0 +1,182 @@
+"""Benchmarks for the data loads, tab derivations and chart rendering.
+
+    python bench.py                       # 1x, 10x and 100x, recorded to bench_history.jsonl
+    python bench.py --scales 1 --repeat 3 --no-record
+
+Every benchmark runs headlessly on synthetic inputs made by tiling the
+bundled CSVs over earlier years, so a 10x GDP input has ten times the
+quarters (the charts still draw 2005 to the last year, so their payload stays
+the same and what grows is the planning work). Store entries are written to a
+temporary directory, never to .store.
+
+Each result is the median wall time over --repeat runs. A run fails (exit
+status 1) when a result is over its budget in BUDGETS_MS, which is scaled
+linearly with the input, or more than --tolerance times the median of the
+last --window recorded results for the same benchmark and scale.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+# charts.py defers this half-second import to the first chart it builds;
+# importing it up front keeps it out of the first chart's timing
+import ipyvizzu  # noqa: F401
+import pandas as pd
+
+import charts
+import ebf
+import figures
+import gdp
+import store
+
+HISTORY = os.path.join(store.BASE_DIR, "bench_history.jsonl")
+
+# Budget for each benchmark at 1x, in milliseconds
+BUDGETS_MS = {
+    "load_data cold": 150,
+    "load_data warm": 20,
+    "tab1 derive": 30,
+    "tab6 melt": 15,
+    "chart1 html": 250,
+    "chart2 html": 400,
+    "chart3 html": 300,
+    "chart4 html": 500,
+    "charts cached": 150,
+}
+
+# chart1-chart4 in the order the tabs show them
+CHART_NAMES = ["gdp_share", "gdp_growth", "state_local_2005", "ebf_funding"]
+
+
+def tile(raw, year, scale):
+    """raw repeated scale times, each copy shifted to the years before the last."""
+    span = int(raw[year].max() - raw[year].min() + 1)
+    return pd.concat([raw.assign(**{year: raw[year] - i * span}) for i in range(scale)], ignore_index=True)
+
+
+def measure(fn, repeat, setup=None):
+    """Median wall time of fn in milliseconds (setup runs untimed before each call)."""
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def run_scale(scale, repeat, workdir):
+    """Median milliseconds of every benchmark on inputs scale times the bundled CSVs."""
+    gdp_raw = tile(pd.read_csv(gdp.GDP_CSV), "year", scale)
+    ebf_raw = tile(pd.read_csv(ebf.EBF_CSV), "Year", scale)
+    gdp_csv = os.path.join(workdir, f"gdp_{scale}x.csv")
+    gdp_raw.to_csv(gdp_csv, index=False)
+
+    def clear_store():
+        shutil.rmtree(store.STORE_DIR, ignore_errors=True)
+
+    def load():
+        return store.load(f"gdp_{scale}x", gdp_csv, gdp.build, salt=gdp.VERSION)
+
+    results = {
+        "load_data cold": measure(load, repeat, setup=clear_store),
+        "load_data warm": measure(load, repeat),
+        "tab1 derive": measure(lambda: gdp.counterfactual(d := gdp.derive(gdp_raw.copy()), gdp.baseline_share(d)), repeat),
+        "tab6 melt": measure(lambda: ebf.derive(ebf_raw), repeat),
+    }
+
+    frames = {**load(), "ebf": ebf.derive(ebf_raw)}
+    # Compiled for the tiled frames, so the bundled data is never loaded
+    compiled = figures.charts_for(last_year=gdp.last_year(frames["gdp"]))
+    warm = charts.RenderCache()
+    for i, name in enumerate(CHART_NAMES, 1):
+        chart = compiled[name]
+        frame = frames[chart["frame"]]
+        render = lambda cache: charts.render(frame, chart["steps"], units=chart["units"], replay=chart["replay"], cache=cache)
+        results[f"chart{i} html"] = measure(lambda: render(charts.RenderCache(max_entries=0)), repeat)
+        render(warm)
+
+    def cached():
+        for name in CHART_NAMES:
+            chart = compiled[name]
+            charts.render(frames[chart["frame"]], chart["steps"], units=chart["units"], replay=chart["replay"], cache=warm)
+    results["charts cached"] = measure(cached, repeat)
+    return results
+
+
+def history(path):
+    """Every recorded run, oldest first."""
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def check(results, past, tolerance, window):
+    """Failure messages for results over budget or regressed against the recent past."""
+    failures = []
+    for scale, benchmarks in results.items():
+        for name, ms in benchmarks.items():
+            budget = BUDGETS_MS.get(name, float("inf")) * int(scale)
+            if ms > budget:
+                failures.append(f"{name} at {scale}x: {ms:.1f} ms is over its {budget:.0f} ms budget")
+            recent = [run["results"][scale][name] for run in past
+                      if name in run["results"].get(scale, {})][-window:]
+            if recent and ms > tolerance * statistics.median(recent):
+                failures.append(f"{name} at {scale}x: {ms:.1f} ms is over {tolerance}x the recent "
+                                f"median of {statistics.median(recent):.1f} ms")
+    return failures
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=store.BASE_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scales", type=int, nargs="*", default=[1, 10, 100], help="input sizes, as multiples of the bundled CSVs")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per benchmark (the median is kept)")
+    parser.add_argument("--history", default=HISTORY, help="JSON lines file the results are compared with and appended to")
+    parser.add_argument("--no-record", action="store_true", help="compare with the history without appending to it")
+    parser.add_argument("--tolerance", type=float, default=1.5, help="allowed slowdown against the recent median")
+    parser.add_argument("--window", type=int, default=5, help="recorded runs the recent median is taken over")
+    args = parser.parse_args(argv)
+
+    store_dir = store.STORE_DIR
+    with tempfile.TemporaryDirectory() as workdir:
+        store.STORE_DIR = os.path.join(workdir, "store")
+        try:
+            results = {str(scale): run_scale(scale, args.repeat, workdir) for scale in args.scales}
+        finally:
+            store.STORE_DIR = store_dir
+
+    print(f"{'benchmark':<16}" + "".join(f"{scale + 'x':>12}" for scale in results))
+    for name in BUDGETS_MS:
+        print(f"{name:<16}" + "".join(f"{results[scale][name]:>9.1f} ms" for scale in results))
+
+    failures = check(results, history(args.history), args.tolerance, args.window)
+    if not args.no_record:
+        record = {"time": time.time(), "commit": _commit(), "python": platform.python_version(),
+                  "repeat": args.repeat, "results": results, "passed": not failures}
+        with open(args.history, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+    for failure in failures:
+        print(f"FAIL {failure}")
+    print("FAIL" if failures else "PASS")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""Wealth tax calculator behind the Tax the Rich Calculator tab.
+
+A rate schedule is a pair of (scenarios, brackets) arrays: thresholds and
+marginal rates, where rate k applies to wealth between threshold k and
+threshold k + 1 (the last bracket is open ended). A flat rate is a single
+bracket starting at 0. revenue() evaluates any number of schedules against
+every holder in one NumPy operation, so sweeping thousands of scenarios for
+a report costs about as much as the single rate the slider shows.
+
+widget() uses that to precompute the revenue of every holder at every
+position of the tab's slider, and returns a self-contained HTML calculator
+(calculator.html) that looks each position up in the browser: moving the
+slider never reaches the server.
+"""
+import base64
+import gzip
+import html
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+import store
+
+ROSTER_CSV = os.path.join(store.BASE_DIR, "data_billionaires.csv")
+WIDGET_HTML = os.path.join(store.BASE_DIR, "calculator.html")
+
+# The tab's tax rate slider, in percent: (min, max, step, default)
+SLIDER = (0.0, 6.995, 0.001, 1.0)
+
+
+def load_roster(csv_path=ROSTER_CSV):
+    """Every roster year: one row per (year, name) with net worth in dollars."""
+    return pd.read_csv(csv_path, dtype={"year": "int16", "name": "str", "wealth": "float64"})
+
+
+def roster(rosters, year=None):
+    """The holders on one year's list (the latest by default), richest first."""
+    year = rosters["year"].max() if year is None else year
+    people = rosters[rosters["year"] == year]
+    return people.sort_values("wealth", ascending=False, kind="stable")[["name", "wealth"]].reset_index(drop=True)
+
+
+def flat(rates):
+    """Schedules taxing all wealth at each of rates."""
+    rates = np.atleast_1d(np.asarray(rates, dtype=float))
+    return np.zeros((len(rates), 1)), rates[:, None]
+
+
+def brackets(thresholds, rates):
+    """Schedules from per-scenario bracket thresholds and marginal rates.
+
+    Either argument may be 1-D to share it across scenarios, e.g. a fixed
+    $1B exemption swept over many rates:
+    brackets([0, 1e9], np.column_stack([np.zeros(n), rates])).
+    """
+    thresholds = np.atleast_2d(np.asarray(thresholds, dtype=float))
+    rates = np.atleast_2d(np.asarray(rates, dtype=float))
+    thresholds, rates = np.broadcast_arrays(thresholds, rates)
+    return thresholds, rates
+
+
+def revenue(wealth, schedules):
+    """Revenue from each holder under each schedule, shape (scenarios, holders)."""
+    wealth = np.asarray(wealth, dtype=float)
+    thresholds, rates = schedules
+    upper = np.concatenate([thresholds[:, 1:], np.full((len(thresholds), 1), np.inf)], axis=1)
+    taxed = np.clip(wealth[None, :, None], thresholds[:, None, :], upper[:, None, :]) - thresholds[:, None, :]
+    return np.einsum("shk,sk->sh", taxed, rates)
+
+
+def sweep(people, schedules):
+    """Total revenue per schedule for the holders in people."""
+    return revenue(people["wealth"], schedules).sum(axis=1)
+
+
+def breakdown(people, rate):
+    """Per-holder revenue at a single flat rate, as a frame."""
+    return people.assign(revenue=revenue(people["wealth"], flat(rate))[0])
+
+
+def slider_rates(slider=SLIDER):
+    """Every rate the slider can land on, as decimals."""
+    lo, hi, step, _ = slider
+    return np.round(lo + step * np.arange(round((hi - lo) / step) + 1), 3) / 100
+
+
+def table(people, rates):
+    """Revenue from each holder (one column per name) and in total at each of rates."""
+    values = revenue(people["wealth"], flat(rates))
+    frame = pd.DataFrame(values, index=pd.Index(rates, name="rate"), columns=people["name"])
+    return frame.assign(total=values.sum(axis=1))
+
+
+def _deltas(values):
+    # Whole dollars as the tab shows them, each after the first as the change
+    # from the one before: a flat rate's steps repeat, so they gzip to almost nothing
+    dollars = np.round(np.asarray(values)).astype("int64")
+    return np.concatenate([dollars[:1], np.diff(dollars)]).tolist()
+
+
+def widget(people, label, slider=SLIDER):
+    """HTML calculator for people with the whole slider domain's revenue table built in."""
+    lo, hi, step, default = slider
+    revenues = table(people, slider_rates(slider))
+    payload = {
+        "min": lo, "max": hi, "step": step, "default": default,
+        "names": people["name"].tolist(),
+        "wealth": np.round(people["wealth"]).astype("int64").tolist(),
+        "total": _deltas(revenues.pop("total")),
+        "revenue": [_deltas(column) for column in revenues.to_numpy().T],
+    }
+    packed = base64.b64encode(gzip.compress(json.dumps(payload, separators=(",", ":")).encode(), 9, mtime=0)).decode()
+    with open(WIDGET_HTML, encoding="utf-8") as f:
+        template = f.read()
+    return template.replace("__LABEL__", html.escape(label)).replace("__TABLE__", packed)
+
+
+if __name__ == "__main__":
+    people = roster(load_roster())
+    rates = np.linspace(0, 0.06995, 6996)
+    totals = sweep(people, flat(rates))
+    print(f"{len(people)} holders, {len(rates)} rates: "
+          f"${totals[0]:,.0f} to ${totals[-1]:,.0f}")
@@ -0,0 +1,220 @@
+"""Build the ipyvizzu charts from a frame and a list of animation steps.
+
+Each step's ``where`` is a pandas query expression. Before anything is
+handed to ``Data().add_df`` the planner evaluates every step's ``where``
+server-side and keeps only the union of rows and the columns the steps
+actually bind to, so the HTML payload carries just what the animation shows.
+The same expression is translated into the step's client-side
+``Data.filter``.
+
+``render()`` returns the finished chart HTML through a content-addressed
+cache: the key is a hash of the planned data plus the steps, so identical
+charts are built once per process (and once per deploy with the disk tier).
+"""
+import hashlib
+import importlib.metadata
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+import profiling
+import store
+
+# ipyvizzu itself takes about half a second to import and is only needed to
+# build a chart, which a warm render cache never does, so it is imported in
+# _build(); the cache keys only need its version
+IPYVIZZU_VERSION = importlib.metadata.version("ipyvizzu")
+
+# String literals, `quoted names`, boolean operators and bare names in a query
+_TOKEN = re.compile(r"""('[^']*'|"[^"]*")|`([^`]*)`|\b(and|or|not|True|False)\b|\b([A-Za-z_]\w*)\b""")
+_JS = {"and": "&&", "or": "||", "not": "!", "True": "true", "False": "false"}
+
+
+def step(where=None, config=None, style=None, **options):
+    """One chart.animate() call: rows matching where, drawn with config/style."""
+    return {"where": where, "config": config or {}, "style": style, "options": options}
+
+
+def _names(where):
+    """Column names referenced by a query expression."""
+    return {quoted or name
+            for literal, quoted, op, name in _TOKEN.findall(where or "")
+            if not literal and not op}
+
+
+def _bound(value):
+    """Every string in a config value (channels may be a name, a list or a dict)."""
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for v in value.values():
+            yield from _bound(v)
+    elif isinstance(value, (list, tuple)):
+        for v in value:
+            yield from _bound(v)
+
+
+def js_filter(where, columns):
+    """Translate a pandas query expression into a Vizzu record filter."""
+    def repl(match):
+        literal, quoted, op, name = match.groups()
+        if literal:
+            return literal
+        if op:
+            return _JS[op]
+        name = quoted or name
+        return f"record[{name!r}]" if name in columns else name
+    return _TOKEN.sub(repl, where)
+
+
+def plan(df, steps):
+    """The rows and columns of df that steps actually use."""
+    rows = pd.Series(False, index=df.index)
+    used = set()
+    for s in steps:
+        rows |= True if s["where"] is None else df.eval(s["where"])
+        used |= _names(s["where"]) | set(_bound(s["config"]))
+    return df.loc[rows, [c for c in df.columns if c in used]]
+
+
+def _build(data, steps, units, width, height):
+    from ipyvizzu import Chart, Config, Data, DisplayTarget, Style
+
+    chart_data = Data()
+    chart_data.add_df(data, units=units or None)
+    chart = Chart(width=width, height=height, display=DisplayTarget.MANUAL)
+    chart.animate(chart_data)
+
+    for s in steps:
+        args = [] if s["where"] is None else [Data.filter(js_filter(s["where"], data.columns))]
+        args.append(Config(s["config"]))
+        if s["style"] is not None:
+            args.append(Style(s["style"]))
+        chart.animate(*args, **s["options"])
+    return chart
+
+
+def chart_key(data, steps, *extra):
+    """Content hash of everything that goes into a chart's HTML."""
+    h = hashlib.sha256(IPYVIZZU_VERSION.encode())
+    h.update(json.dumps([list(map(str, data.columns)), list(map(str, data.dtypes))]).encode())
+    h.update(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+    h.update(json.dumps([steps, *extra], sort_keys=True, default=str).encode())
+    return h.hexdigest()[:32]
+
+
+class RenderCache:
+    """LRU of rendered chart HTML keyed by chart_key(), with an optional on-disk tier.
+
+    The disk tier keeps its max_disk_entries most recently used files: a hit
+    touches its file and every put drops the oldest beyond that.
+    """
+
+    def __init__(self, max_entries=64, directory=None, max_disk_entries=256):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.max_disk_entries = max_disk_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.html")
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        if self.directory and os.path.exists(self._path(key)):
+            try:
+                with open(self._path(key), encoding="utf-8") as f:
+                    html = f.read()
+                os.utime(self._path(key))
+            except FileNotFoundError:
+                # Pruned by another process in between
+                return None
+            self._remember(key, html)
+            return html
+        return None
+
+    def put(self, key, html):
+        self._remember(key, html)
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(html)
+            os.replace(tmp, self._path(key))
+            self._prune()
+
+    def _prune(self):
+        paths = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".html"):
+                try:
+                    paths.append((entry.stat().st_mtime_ns, entry.path))
+                except FileNotFoundError:
+                    pass
+        for _, path in sorted(paths)[:max(len(paths) - self.max_disk_entries, 0)]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _remember(self, key, html):
+        with self._lock:
+            self._entries[key] = html
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+# Set CHART_CACHE_DISK=0 to keep rendered charts in memory only
+CACHE = RenderCache(directory=None if os.environ.get("CHART_CACHE_DISK") == "0" else os.path.join(store.STORE_DIR, "charts"))
+
+
+# Replaying reloads the component's own document, which plays the animation
+# again in the browser without a round trip to the server
+REPLAY_BUTTON = """<style>
+.replay {{background-color: #e57373; color: white; border: none; border-radius: 0.5rem;
+  padding: 0.25rem 0.75rem; min-height: 2.5rem; font: 1rem "Source Sans Pro", sans-serif; cursor: pointer;}}
+.replay:hover {{filter: brightness(0.9);}}
+</style>
+<button class="replay" onclick="window.location.reload()">{label}</button>
+"""
+
+
+def _prepare(df, steps, units, width, height, replay):
+    data = plan(df, steps)
+    units = {k: v for k, v in (units or {}).items() if k in data.columns}
+    return data, units, chart_key(data, steps, units, width, height, replay)
+
+
+def key(df, steps, units=None, width="100%", height="400px", replay=None):
+    """The cache key render() files this chart's HTML under."""
+    return _prepare(df, steps, units, width, height, replay)[2]
+
+
+def render(df, steps, units=None, width="100%", height="400px", replay=None, cache=CACHE):
+    """HTML for the chart that plays steps over the planned slice of df, served from cache when possible.
+
+    With replay set, a button with that label is added above the chart that
+    replays the animation client-side.
+    """
+    with profiling.profile("plan"):
+        data, units, key = _prepare(df, steps, units, width, height, replay)
+    html = cache.get(key)
+    if html is None:
+        with profiling.profile("animate"):
+            chart = _build(data, steps, units, width, height)
+        with profiling.profile("repr_html") as span:
+            html = chart._repr_html_()
+            span.html_bytes = len(html.encode("utf-8"))
+        if replay:
+            html = REPLAY_BUTTON.format(label=replay) + html
+        cache.put(key, html)
+    return html
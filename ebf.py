@@ -0,0 +1,39 @@
+"""Illinois Evidence-Based Funding (EBF) frames behind the EBF underfunding chart.
+
+Run ``python ebf.py`` to build the derived-frame store ahead of time.
+"""
+import os
+
+import pandas as pd
+
+import formatting
+import store
+
+EBF_CSV = os.path.join(store.BASE_DIR, "data_ebf.csv")
+
+# Bump when the derivations below change so stale store entries get rebuilt
+VERSION = 1
+
+
+def derive(data):
+    """Long format (one row per year and funding type) with chart labels."""
+    # Melt data so that Gap, Needed funding, and Actual funding are in one column
+    data_melted = data.melt(id_vars=["Year"], value_vars=["Gap", "Needed", "Actual"], var_name="Type", value_name="Amount")
+    data_melted['year_type'] = data_melted['Year'].astype(str)
+    data_melted['Amount_str'] = formatting.money(data_melted['Amount'], units=("B", "M"), sep=" ")
+    return data_melted
+
+
+def build(csv_path):
+    """Derive every EBF frame the app needs from the raw CSV."""
+    return {"ebf": derive(pd.read_csv(csv_path))}
+
+
+def load(csv_path=EBF_CSV):
+    """Memory-map the derived EBF frames, rebuilding them if the CSV changed."""
+    return store.load("ebf", csv_path, build, salt=VERSION)
+
+
+if __name__ == "__main__":
+    for name, frame in load().items():
+        print(f"{name}: {len(frame)} rows, {len(frame.columns)} columns")
@@ -0,0 +1,129 @@
+"""Pre-render the story charts to static files for a CDN or plain web server.
+
+    python export.py [--out static/charts]
+
+Every chart in figures.charts_for() is written as a minified standalone HTML page
+and as JSON holding the data it plots and its animation steps. File names
+carry a hash of their content, so they can be served with a far-future
+cache lifetime, and each file gets a gzip copy alongside for servers that
+serve precompressed assets. manifest.json maps chart names to their files
+and records each chart's render key: the app only uses an export whose key
+matches the chart it would build itself, and builds the chart otherwise.
+
+Set CHART_BASE_URL to where the export directory is published (e.g.
+https://cdn.example.org/charts/) to have the app embed the files from there
+instead of inlining them.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+
+import charts
+import figures
+import store
+
+OUT_DIR = os.path.join(store.BASE_DIR, "static", "charts")
+MANIFEST = "manifest.json"
+BASE_URL = os.environ.get("CHART_BASE_URL")
+
+PAGE = ('<!DOCTYPE html><html lang="en"><head><meta charset="utf-8">'
+        '<meta name="viewport" content="width=device-width, initial-scale=1">'
+        '<title>{title}</title></head><body style="margin:0">{body}</body></html>')
+
+_INDENT = re.compile(r"^[ \t]+|[ \t]+$", re.MULTILINE)
+_BLANK_LINES = re.compile(r"\n{2,}")
+
+
+def minify(html):
+    """Strip indentation, trailing whitespace and blank lines."""
+    return _BLANK_LINES.sub("\n", _INDENT.sub("", html)).strip()
+
+
+def standalone(name, html):
+    """A chart's HTML as a complete page."""
+    return PAGE.format(title=name, body=minify(html))
+
+
+def _write(out_dir, name, suffix, content):
+    """Write content under a fingerprinted name plus a gzip copy; return the name."""
+    data = content.encode("utf-8")
+    filename = f"{name}.{hashlib.sha256(data).hexdigest()[:12]}{suffix}"
+    path = os.path.join(out_dir, filename)
+    with open(path, "wb") as f:
+        f.write(data)
+    with open(f"{path}.gz", "wb") as f:
+        f.write(gzip.compress(data, 9, mtime=0))
+    return filename
+
+
+def export(out_dir=OUT_DIR, frames=None):
+    """Write every story chart to out_dir and return the manifest."""
+    frames = figures.load_frames() if frames is None else frames
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = {}
+    for name, chart in figures.charts_for().items():
+        frame = frames[chart["frame"]]
+        steps = chart["steps"]
+        data = charts.plan(frame, steps)
+        payload = json.dumps({"data": json.loads(data.to_json(orient="records")), "steps": steps},
+                             separators=(",", ":"), default=str)
+        manifest[name] = {
+            "key": figures.key(name, frame),
+            "html": _write(out_dir, name, ".html", standalone(name, figures.render(name, frame))),
+            "json": _write(out_dir, name, ".json", payload),
+        }
+
+    # Drop the files of earlier exports
+    keep = {f for entry in manifest.values() for f in (entry["html"], entry["json"])}
+    for filename in os.listdir(out_dir):
+        if filename.split(".")[0] in manifest and filename.removesuffix(".gz") not in keep:
+            os.remove(os.path.join(out_dir, filename))
+
+    tmp = os.path.join(out_dir, f"{MANIFEST}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, os.path.join(out_dir, MANIFEST))
+    return manifest
+
+
+def signature(out_dir=OUT_DIR):
+    """store.signature() of the manifest, or None before the first export."""
+    try:
+        return store.signature(os.path.join(out_dir, MANIFEST))
+    except FileNotFoundError:
+        return None
+
+
+def current(frames, out_dir=OUT_DIR):
+    """Manifest entries, by chart name, whose export matches the chart built from frames."""
+    try:
+        with open(os.path.join(out_dir, MANIFEST), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return {}
+    compiled = figures.charts_for()
+    return {
+        name: entry for name, entry in manifest.items()
+        if name in compiled
+        and entry["key"] == figures.key(name, frames[compiled[name]["frame"]])
+        and os.path.exists(os.path.join(out_dir, entry["html"]))
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--out", default=OUT_DIR, help="directory to write the charts and manifest to")
+    args = parser.parse_args(argv)
+
+    manifest = export(args.out)
+    for name, entry in manifest.items():
+        size = os.path.getsize(os.path.join(args.out, entry["html"]))
+        packed = os.path.getsize(os.path.join(args.out, entry["html"] + ".gz"))
+        print(f"{name}: {entry['html']} ({size:,} bytes, {packed:,} gzipped), {entry['json']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""The story charts: the frame each one draws and its animation steps.
+
+The charts are declared in figures.json and compiled, on first use, into
+charts.step() lists. A chart entry names the frame it draws, its add_df
+units and replay button label, and its steps. A step is a charts.step() in
+JSON, except that:
+
+- ``style`` names an entry of the shared ``styles`` table;
+- ``animation`` names an entry of the shared ``animations`` table, which
+  ``options`` is merged over;
+- ``"for": {"y": [first, last, step]}`` repeats the step for every y from
+  first to last by step, and for last itself, with ``{y}`` substituted
+  into its strings;
+- ``{state}`` and ``{possessive}`` (e.g. "Illinois'") are filled in with
+  the state the chart is drawn for, and ``{last_year}`` (also allowed as a
+  "for" bound) with the latest year of its GDP data (gdp.last_year()).
+
+Each chart draws the coarsest frame that still tells its story, so its
+payload stays flat however fine the data gets: gdp_annual for bars by year,
+gdp_quarterly for a single quarter (see gdp.resolutions()), and the full
+gdp frame only for a chart that needs every reading.
+
+So a new chart is a new entry in figures.json, and the GDP charts are
+compiled (once) for any state with a data partition and recompiled when an
+ingested quarter moves its last year.
+
+Kept apart from the Streamlit tabs so the charts can also be built
+headlessly (see export.py).
+"""
+import functools
+import json
+import os
+import weakref
+
+import charts
+import ebf
+import gdp
+import registry
+import store
+
+SPEC_JSON = os.path.join(store.BASE_DIR, "figures.json")
+
+
+def _substitute(value, names):
+    """value with {name} placeholders in its strings filled in from names."""
+    if isinstance(value, str):
+        return value.format_map(names)
+    if isinstance(value, dict):
+        return {k: _substitute(v, names) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_substitute(v, names) for v in value]
+    return value
+
+
+def _loop(spec, names):
+    """Every binding of the step's "for" variables (one empty binding without one)."""
+    bindings = [{}]
+    for name, bounds in (spec.get("for") or {}).items():
+        first, last, step = (int(_substitute(b, names)) for b in bounds)
+        values = list(range(first, last + 1, step))
+        if values and values[-1] != last:
+            values.append(last)
+        bindings = [{**b, name: v} for b in bindings for v in values]
+    return bindings
+
+
+def possessive(name):
+    return f"{name}'" if name.endswith("s") else f"{name}'s"
+
+
+def compile_steps(steps, styles, animations, names):
+    """charts.step() list for a chart's declared steps, with names filled in."""
+    compiled = []
+    for spec in steps:
+        style = styles[spec["style"]] if "style" in spec else None
+        options = {**animations.get(spec.get("animation"), {}), **spec.get("options", {})}
+        for loop in _loop(spec, names):
+            compiled.append(charts.step(
+                _substitute(spec.get("where"), {**names, **loop}),
+                _substitute(spec.get("config"), {**names, **loop}),
+                style,
+                **options,
+            ))
+    return tuple(compiled)
+
+
+def compile_spec(spec, state=gdp.DEFAULT_STATE, last_year=None):
+    """Chart name -> frame, units, replay label and compiled steps for state, ending at last_year."""
+    names = {"state": state, "possessive": possessive(state), "last_year": last_year}
+    return {
+        name: {
+            "frame": chart["frame"],
+            "units": chart.get("units"),
+            "replay": chart.get("replay"),
+            "steps": compile_steps(chart["steps"], spec.get("styles", {}), spec.get("animations", {}), names),
+        }
+        for name, chart in spec["charts"].items()
+    }
+
+
+with open(SPEC_JSON, encoding="utf-8") as f:
+    SPEC = json.load(f)
+
+
+@functools.lru_cache(maxsize=None)
+def _compiled(state, last_year):
+    return compile_spec(SPEC, state, last_year)
+
+
+def charts_for(state=gdp.DEFAULT_STATE, last_year=None):
+    """The story charts compiled for state, ending at last_year (by default that of state's current data).
+
+    Nothing is loaded until a chart is asked for, so importing this module
+    never touches the data or the store.
+    """
+    if last_year is None:
+        last_year = gdp.last_year(registry.gdp_frames(state)["gdp"])
+    return _compiled(state, last_year)
+
+
+def load_frames(state=gdp.DEFAULT_STATE):
+    """Every frame the story charts draw, by name."""
+    return {**gdp.load(state), **ebf.load()}
+
+
+def key(name, frame, state=gdp.DEFAULT_STATE):
+    """Content hash of chart name drawn from frame (see charts.chart_key)."""
+    chart = charts_for(state)[name]
+    return charts.key(frame, chart["steps"], units=chart["units"], replay=chart["replay"])
+
+
+# (chart name, state) -> (weak reference to the frozen frame it was drawn from, HTML)
+_rendered = {}
+
+
+def render(name, frame, state=gdp.DEFAULT_STATE):
+    """HTML for chart name drawn from frame (through the chart render cache).
+
+    Frozen frames cannot change, so the HTML drawn from one is remembered
+    and a rerun with the same frame skips planning and hashing altogether.
+    """
+    ref, html = _rendered.get((name, state), (None, None))
+    if ref is not None and ref() is frame:
+        return html
+    chart = charts_for(state)[name]
+    html = charts.render(frame, chart["steps"], units=chart["units"], replay=chart["replay"])
+    if isinstance(frame, store.FrozenFrame):
+        _rendered[name, state] = (weakref.ref(frame), html)
+    return html
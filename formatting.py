@@ -0,0 +1,105 @@
+"""Vectorized chart labels shared by every chart in the app.
+
+The helpers take and return pandas Series (index preserved) and build the
+strings with Arrow compute kernels instead of a Python call per row, so they
+stay cheap on the large regional/quarterly extracts as well as the bundled
+CSVs. Missing values get an empty label.
+"""
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+UNITS = {"T": 1e12, "B": 1e9, "M": 1e6, "K": 1e3}
+
+
+def _series(labels, index):
+    """Wrap an Arrow string array as a Series, with "" for missing labels."""
+    return pc.fill_null(labels, "").to_pandas().set_axis(index)
+
+
+def _decimal(values, digits):
+    """Arrow strings of values to a fixed number of decimals (nulls where values is NaN)."""
+    missing = np.isnan(values)
+    magnitude = np.abs(np.where(missing, 0, values))
+    scaled = magnitude * 10**digits
+    steps = np.rint(scaled)
+    # Scaling can turn a value just above a tie into the tie itself (820.85 * 10
+    # is exactly 8208.5, which rint takes to even), so values that close to one
+    # are rounded by format(), which rounds the exact value as the labels always have
+    tie = np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-9 * np.maximum(scaled, 1))
+    steps[tie] = [int(format(x, f".{digits}f").replace(".", "")) for x in magnitude[tie]]
+    steps = steps.astype(np.int64)
+    whole = pc.cast(pa.array(steps // 10**digits), pa.string())
+    if digits:
+        frac = pc.utf8_lpad(pc.cast(pa.array(steps % 10**digits), pa.string()), digits, "0")
+        whole = pc.binary_join_element_wise(whole, frac, ".")
+    sign = pa.array(["", "-"]).take(pa.array((values < 0).astype(np.int8)))
+    return pc.if_else(pa.array(missing), None, pc.binary_join_element_wise(sign, whole, ""))
+
+
+def decimal(values, digits=1):
+    """Fixed-point labels, e.g. 1.26 -> "1.3" for digits=1."""
+    values = pd.Series(values, dtype=float)
+    return _series(_decimal(values.to_numpy(), digits), values.index)
+
+
+def money(values, units=("T", "B"), sep="", digits=1):
+    """Dollar labels like "$1.2T" or "$850.0 M".
+
+    Each value is shown in the largest of units (ordered largest first) that
+    it reaches, falling back to the last one.
+    """
+    values = pd.Series(values, dtype=float)
+    v = values.to_numpy()
+    scales = np.array([UNITS[u] for u in units])
+    reached = v[:, None] >= scales[None, :]
+    pick = np.where(reached.any(axis=1), reached.argmax(axis=1), len(units) - 1)
+    suffix = pa.array([sep + u for u in units]).take(pa.array(pick))
+    labels = pc.binary_join_element_wise("$", _decimal(v / scales[pick], digits), suffix, "")
+    return _series(labels, values.index)
+
+
+def percent(values, digits=2):
+    """Percent labels for shares, e.g. 0.0738 -> "7.38%"."""
+    values = pd.Series(values, dtype=float)
+    v = (values * 100).round(digits).to_numpy()
+    text = pc.cast(pa.array(v, from_pandas=True), pa.string())
+    # Arrow prints 7.0 as "7"; keep the trailing ".0" like str(float) does
+    text = pc.if_else(pc.match_substring_regex(text, r"[.e]"), text, pc.binary_join_element_wise(text, ".0", ""))
+    return _series(pc.binary_join_element_wise(text, "%", ""), values.index)
+
+
+def at_years(labels, years, keep):
+    """Blank every label whose year is not in keep (e.g. the chart endpoints)."""
+    return labels.where(pd.Series(years).isin(keep), "")
+
+
+def main(argv=None):
+    """Check money() against the f-string labels it replaced, on ties and random amounts."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--samples", type=int, default=100000, help="random amounts to check")
+    args = parser.parse_args(argv)
+
+    # BEA amounts are in millions of dollars
+    rng = np.random.default_rng(0)
+    millions = np.concatenate([
+        [0, 50, 150, 250, 820850, 999950, 1000000, 1234550, 1e-3, 0.049],
+        np.arange(0, 2000000, 50, dtype=float),
+        np.round(rng.uniform(0, 5e6, args.samples), 1),
+        rng.uniform(0, 5e6, args.samples),
+    ])
+    old = [f"${x/1000000:.1f}T" if x >= 1000000 else f"${x/1000:.1f}B" for x in millions]
+    new = money(millions * 1000000)
+    wrong = [(x, a, b) for x, a, b in zip(millions, old, new) if a != b]
+    print(f"{len(millions) - len(wrong)}/{len(millions)} labels match")
+    for x, a, b in wrong[:10]:
+        print(f"  {x!r}: {a!r} != {b!r}")
+    sys.exit(bool(wrong))
+
+
+if __name__ == "__main__":
+    main()
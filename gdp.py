@@ -0,0 +1,247 @@
+"""State GDP (BEA) frames behind the Scarcity Myth charts.
+
+The data is partitioned by state: data_gdp/<state>.csv holds one state's
+quarters and is derived into its own store entry, so the app only ever
+loads the state on screen. ``python gdp.py --partition table.csv`` splits a
+multi-state BEA table (the data_gdp columns plus ``state``) into partitions.
+
+Run ``python gdp.py`` to build the derived-frame store ahead of time, and
+``python gdp.py --ingest new_quarter.csv`` to append a new BEA quarter: the
+rows are validated, appended to the state's CSV and derived on their own,
+then merged into the stored frames without re-deriving the historical rows.
+"""
+import argparse
+import os
+
+import pandas as pd
+
+import formatting
+import store
+import streaming
+
+GDP_DIR = os.path.join(store.BASE_DIR, "data_gdp")
+DEFAULT_STATE = "Illinois"
+
+# Bump when the derivations below change so stale store entries get rebuilt
+VERSION = 4
+
+# The quarter whose state and local share the counterfactual holds fixed
+BASELINE = (2005, "Q1")
+
+# Raw columns of a partition and the sectors every quarter has one row for
+COLUMNS = ["year", "quarter", "gdp", "gdp_pct", "type", "total"]
+DTYPES = {"year": "int64", "quarter": "str", "gdp": "float64", "gdp_pct": "float64", "type": "str", "total": "float64"}
+SECTORS = ["Private Sector", "State and Local Governments", "Federal Government"]
+QUARTERS = ["Q1", "Q2", "Q3", "Q4"]
+
+
+def csv_path(state):
+    """The partition holding state's quarters."""
+    return os.path.join(GDP_DIR, f"{state}.csv")
+
+
+GDP_CSV = csv_path(DEFAULT_STATE)
+
+
+def states():
+    """Every state with a partition, alphabetically."""
+    return sorted(f[:-len(".csv")] for f in os.listdir(GDP_DIR) if f.endswith(".csv"))
+
+
+def last_year(df):
+    """The latest year with a BASELINE-quarter row, where the charts end."""
+    return int(df.loc[df['quarter'] == BASELINE[1], 'year'].max())
+
+
+def label(df, last):
+    """Set the dollar labels, which only the BASELINE year's and last's bars carry."""
+    df['gdp_label'] = formatting.at_years(formatting.money(df['gdp']), df['year'], (BASELINE[0], last))
+    if 'gdp_pct_str' in df.columns:
+        df['combined_label'] = (df['gdp_label'] + " (" + df['gdp_pct_str'] + ")").where(df['gdp_label'] != "", "")
+    return df
+
+
+def derive(df, last=None):
+    """Add the label and scaled columns the tab1 charts bind to (labelled up to last, by default df's last_year)."""
+    last = last_year(df) if last is None else last
+    df['gdp'] = df['gdp']*1000000
+    df['total'] = df['total']*1000000
+    df['year_type'] = df['year'].astype(str)
+    df['gdp_pct_100'] = (df['gdp_pct']*100).round(2)
+    df['gdp_pct_str'] = formatting.percent(df['gdp_pct'])
+    df['gdp_label'] = ""
+    df['gdp_label_total'] = formatting.money(df['total'])
+    df['combined_label'] = ""
+    label(df, last)
+    return df
+
+
+def resolutions(df):
+    """The quarterly and annual frames the charts draw: one reading per quarter, and per year.
+
+    A quarter with several readings (monthly data, repeated rows) keeps its
+    last one. A year is read at its BASELINE quarter, as the charts and the
+    2005 share always are; a year without one is left out.
+    """
+    quarterly = df.drop_duplicates(['year', 'quarter', 'type'], keep='last').reset_index(drop=True)
+    annual = quarterly[quarterly['quarter'] == BASELINE[1]].reset_index(drop=True)
+    return {"gdp_quarterly": quarterly, "gdp_annual": annual}
+
+
+def baseline_share(df):
+    """State and local governments' share of GDP in the BASELINE quarter."""
+    year, quarter = BASELINE
+    rows = df[(df['type'] == 'State and Local Governments') & (df['year'] == year) & (df['quarter'] == quarter)]
+    return float(rows['gdp_pct'].iloc[0])
+
+
+def counterfactual(df, share, last=None):
+    """State and local GDP next to what it would be had the 2005 share held."""
+    state_and_local = df[(df['type'] == 'State and Local Governments') & (df['quarter']=="Q1")]
+    state_and_local = state_and_local[['year','year_type','gdp']].copy()
+    state_and_local['type'] = "GDP"
+
+    state_and_local_2005 = df[(df['type'] == 'Private Sector') & (df['quarter']=="Q1")]
+    state_and_local_2005 = state_and_local_2005[['year','year_type']].assign(gdp=state_and_local_2005['total'] * share)
+    state_and_local_2005['type'] = "GDP at 2005 level"
+
+    df2 = pd.concat([state_and_local,state_and_local_2005], ignore_index=True)
+    return label(df2, last_year(df) if last is None else last)
+
+
+def build(csv_path):
+    """Derive every GDP frame the app needs from the raw BEA extract."""
+    df = derive(pd.read_csv(csv_path))
+    return {"gdp": df, **resolutions(df), "gdp_2005": counterfactual(df, baseline_share(df))}
+
+
+def load(state=DEFAULT_STATE):
+    """Memory-map one state's derived GDP frames, rebuilding them if its CSV changed."""
+    return store.load(f"gdp/{state}", csv_path(state), build, salt=VERSION)
+
+
+def _period(year, quarter):
+    return year * 4 + QUARTERS.index(quarter)
+
+
+def validate(new, latest):
+    """Raise ValueError unless new holds whole quarters that follow latest (a (year, quarter) pair)."""
+    if list(new.columns) != COLUMNS:
+        raise ValueError(f"expected columns {COLUMNS}, got {list(new.columns)}")
+    if new.empty:
+        raise ValueError("no rows to ingest")
+    if not new["quarter"].isin(QUARTERS).all() or not new["type"].isin(SECTORS).all():
+        raise ValueError(f"quarter must be one of {QUARTERS} and type one of {SECTORS}")
+    for col in ["year", "gdp", "gdp_pct"]:
+        if not pd.api.types.is_numeric_dtype(new[col]) or new[col].isna().any():
+            raise ValueError(f"{col} must be numeric with no missing values")
+    if not pd.api.types.is_numeric_dtype(new["total"]):
+        raise ValueError("total must be numeric")
+    private = new["type"] == "Private Sector"
+    if new.loc[private, "total"].isna().any():
+        raise ValueError("Private Sector rows must carry the total")
+
+    periods = new.groupby(["year", "quarter"], sort=False)
+    for (year, quarter), rows in periods:
+        if sorted(rows["type"]) != sorted(SECTORS):
+            raise ValueError(f"{year} {quarter} needs exactly one row per sector")
+        if abs(rows["gdp_pct"].sum() - 1) > 1e-3:
+            raise ValueError(f"{year} {quarter} sector shares sum to {rows['gdp_pct'].sum():.4f}, not 1")
+    order = [_period(y, q) for y, q in periods.groups]
+    if order != list(range(_period(*latest) + 1, _period(*latest) + 1 + len(order))):
+        raise ValueError(f"new quarters must directly follow {latest[0]} {latest[1]}, in order")
+
+
+def _merge(old, new):
+    """new appended to the end of each type's block of old, as counterfactual() orders them."""
+    rank = {kind: i for i, kind in enumerate(old["type"].unique())}
+    merged = pd.concat([old, new], ignore_index=True)
+    return merged.sort_values("type", key=lambda t: t.map(rank), kind="stable").reset_index(drop=True)
+
+
+def ingest(new_csv, state=DEFAULT_STATE):
+    """Append the quarters in new_csv to state's partition and to the derived store.
+
+    Only the new rows are derived: every derived column depends on its own
+    row alone, and the quarterly and annual readings and the 2005-share
+    projection on its own quarter, except the dollar labels, which depend on the last year. A
+    new year's BASELINE quarter moves that endpoint, and then only the old
+    and new endpoint years are relabelled. The merged frames are stored under the
+    hash of the extended CSV before the CSV is appended to, so the next load()
+    (and the app, whose cache is keyed on the CSV's signature) finds them
+    instead of rebuilding them.
+    """
+    frames = load(state)
+    new = pd.read_csv(new_csv)
+    latest = max(zip(frames["gdp"]["year"], frames["gdp"]["quarter"]), key=lambda p: _period(*p))
+    validate(new, latest)
+
+    # The same frames build() would make from the extended CSV
+    old_last = last_year(frames["gdp"])
+    last = last_year(pd.concat([frames["gdp"][["year", "quarter"]], new[["year", "quarter"]]]))
+    derived = derive(new, last)
+    share = baseline_share(frames["gdp"])
+    frames = {
+        "gdp": pd.concat([frames["gdp"], derived], ignore_index=True),
+        **{name: pd.concat([frames[name], frame], ignore_index=True) for name, frame in resolutions(derived).items()},
+        "gdp_2005": _merge(frames["gdp_2005"], counterfactual(derived, share, last)),
+    }
+    if last != old_last:
+        for df in frames.values():
+            rows = df["year"].isin([old_last, last])
+            cols = [c for c in ["gdp_label", "combined_label"] if c in df.columns]
+            df.loc[rows, cols] = label(df.loc[rows].copy(), last)[cols]
+
+    # The entry goes in first: a load() that sees the extended CSV then finds it
+    # instead of rebuilding it alongside this one
+    with open(new_csv, "rb") as f:
+        rows = f.read().splitlines()[1:]
+    appended = b"".join(row + b"\n" for row in rows if row)
+    store.put(f"gdp/{state}", csv_path(state), frames, salt=VERSION, appended=appended)
+    with open(csv_path(state), "ab") as f:
+        f.write(appended)
+    return frames
+
+
+def partition(table_csv):
+    """Split a multi-state table into one partition per state; return the states written.
+
+    The table is read a block at a time (see streaming.py) and each block's
+    rows are appended to their state's file, so memory holds one block and
+    then one state at a time, however large the table. Each file is then
+    rewritten the way the partitions are laid out: each sector's quarters in
+    order, one sector after another.
+    """
+    os.makedirs(GDP_DIR, exist_ok=True)
+    written = set()
+    for block in streaming.chunks(table_csv, usecols=COLUMNS + ["state"], dtype={**DTYPES, "state": "str"}):
+        for state, rows in block.groupby("state", sort=False):
+            rows[COLUMNS].to_csv(csv_path(state), mode="a" if state in written else "w", header=state not in written,
+                                 index=False, float_format="%.12g")
+            written.add(state)
+    for state in sorted(written):
+        rows = pd.read_csv(csv_path(state), dtype=DTYPES)
+        rows["sector"] = rows["type"].map(SECTORS.index)
+        rows["period"] = [_period(y, q) for y, q in zip(rows["year"], rows["quarter"])]
+        rows = rows.sort_values(["sector", "period"], kind="stable")
+        rows[COLUMNS].to_csv(csv_path(state), index=False, float_format="%.12g")
+    return sorted(written)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--state", default=DEFAULT_STATE, help="partition to build or ingest into")
+    parser.add_argument("--ingest", metavar="CSV", help="append the quarters in CSV (same columns as a partition)")
+    parser.add_argument("--partition", metavar="CSV", help="split a multi-state table with a state column into partitions")
+    args = parser.parse_args(argv)
+
+    if args.partition:
+        print(f"{len(partition(args.partition))} partitions written to {GDP_DIR}")
+        return
+    frames = ingest(args.ingest, args.state) if args.ingest else load(args.state)
+    for name, frame in frames.items():
+        print(f"{args.state} {name}: {len(frame)} rows, {len(frame.columns)} columns")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""Drive many simulated sessions against a local Streamlit server.
+
+    python loadtest.py --sessions 30 --rounds 3 --drags 5 --server-calculator
+
+Starts ``streamlit run app.py`` on a free port and opens --sessions
+websocket sessions at once, speaking Streamlit's own protocol the way a
+browser does. Each session loads the page and then, for --rounds rounds,
+releases the tax_rate slider --drags times if the server shows one (each
+release reruns the calculator tab's fragment) and reloads the page (a full
+rerun). Reports
+p50/p95/p99 rerun latency for full and fragment reruns, the server's CPU
+use and its RSS, in total and per session.
+
+Switching tabs, the charts' replay buttons and, by default, the calculator's
+slider never reach the server (tabs are switched in the browser, replay
+reloads the chart's own frame and the calculator looks every slider position
+up in the browser), so they cost nothing here and are not simulated. Pass
+--server-calculator to serve the Streamlit slider instead (CLIENT_CALCULATOR=0)
+and drive its fragment reruns.
+
+Linux only: CPU and memory are read from /proc. Needs the websockets
+package, which recent Streamlit releases install.
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import numpy as np
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+import store
+
+APP = os.path.join(store.BASE_DIR, "app.py")
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port, env=None, timeout=60):
+    """Launch the app headless on port and wait until it answers its health check."""
+    server = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", APP, "--server.headless", "true",
+         "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env={**os.environ, **(env or {})},
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1):
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError(f"streamlit did not come up on port {port} within {timeout}s")
+
+
+def cpu_seconds(pid):
+    """User plus system CPU time the process has used."""
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+
+
+def rss_mb(pid):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+class Session:
+    """One browser tab's websocket session."""
+
+    def __init__(self, url):
+        self.url = url
+        self.slider = None
+        self.latencies = {"full": [], "fragment": []}
+
+    async def _rerun(self, ws, kind, widget_value=None):
+        msg = BackMsg()
+        rerun = msg.rerun_script
+        rerun.query_string = ""
+        rerun.page_script_hash = ""
+        if widget_value is not None:
+            slider_id, fragment_id = self.slider
+            state = rerun.widget_states.widgets.add()
+            state.id = slider_id
+            state.double_array_value.data.append(widget_value)
+            rerun.fragment_id = fragment_id
+
+        start = time.perf_counter()
+        await ws.send(msg.SerializeToString())
+        while True:
+            reply = ForwardMsg()
+            reply.ParseFromString(await ws.recv())
+            kind_of = reply.WhichOneof("type")
+            if kind_of == "delta" and reply.delta.WhichOneof("type") == "new_element":
+                element = reply.delta.new_element
+                if element.WhichOneof("type") == "slider" and self.slider is None:
+                    self.slider = (element.slider.id, reply.delta.fragment_id)
+            elif kind_of == "script_finished":
+                self.latencies[kind].append((time.perf_counter() - start) * 1000)
+                return
+
+    async def run(self, rounds, drags, rng):
+        async with websockets.connect(self.url, max_size=None) as ws:
+            await self._rerun(ws, "full")
+            for _ in range(rounds):
+                for _ in range(drags if self.slider else 0):
+                    await asyncio.sleep(rng.uniform(0.05, 0.3))
+                    await self._rerun(ws, "fragment", round(rng.uniform(0, 6.995), 3))
+                await self._rerun(ws, "full")
+
+
+async def _drive(url, sessions, rounds, drags, pid, seed):
+    """Run every session concurrently, sampling the server's RSS while they run."""
+    peak = [rss_mb(pid)]
+
+    async def sample():
+        while True:
+            peak[0] = max(peak[0], rss_mb(pid))
+            await asyncio.sleep(0.1)
+
+    sampler = asyncio.create_task(sample())
+    clients = [Session(url) for _ in range(sessions)]
+    try:
+        await asyncio.gather(*(c.run(rounds, drags, random.Random(seed + i)) for i, c in enumerate(clients)))
+    finally:
+        sampler.cancel()
+    return clients, peak[0]
+
+
+def percentiles(values):
+    if not values:
+        return "no reruns"
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return f"p50 {p50:7.1f} ms  p95 {p95:7.1f} ms  p99 {p99:7.1f} ms  ({len(values)} reruns)"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sessions", type=int, default=20, help="concurrent sessions")
+    parser.add_argument("--rounds", type=int, default=3, help="slider-drags-then-reload rounds per session")
+    parser.add_argument("--drags", type=int, default=5, help="slider releases per round")
+    parser.add_argument("--port", type=int, help="port to run the server on (default: any free port)")
+    parser.add_argument("--server-calculator", action="store_true", help="serve the calculator as a Streamlit slider and drag it")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    port = args.port or free_port()
+    server = start_server(port, {"CLIENT_CALCULATOR": "0"} if args.server_calculator else None)
+    try:
+        url = f"ws://127.0.0.1:{port}/_stcore/stream"
+        # One session first, so caches are warm and the baseline includes them
+        asyncio.run(_drive(url, 1, 0, 0, server.pid, args.seed))
+        time.sleep(1)
+        idle_rss, cpu_start, start = rss_mb(server.pid), cpu_seconds(server.pid), time.perf_counter()
+        clients, peak_rss = asyncio.run(_drive(url, args.sessions, args.rounds, args.drags, server.pid, args.seed))
+        wall, cpu = time.perf_counter() - start, cpu_seconds(server.pid) - cpu_start
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    print(f"{args.sessions} sessions x {args.rounds} rounds of {args.drags} slider drags and a reload, {wall:.1f} s")
+    print(f"full reruns      {percentiles([ms for c in clients for ms in c.latencies['full']])}")
+    print(f"fragment reruns  {percentiles([ms for c in clients for ms in c.latencies['fragment']])}")
+    print(f"server CPU       {cpu:.2f} s ({100 * cpu / wall:.0f}% of one core), {cpu / args.sessions * 1000:.0f} ms per session")
+    print(f"server RSS       {idle_rss:.0f} MB warm and idle, {peak_rss:.0f} MB peak, "
+          f"{(peak_rss - idle_rss) / args.sessions:.2f} MB per session")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Lightweight per-run instrumentation: wall time, allocations and HTML bytes.
+
+``profile(name)`` works as a context manager or decorator. Spans nest, and
+each finished span records its wall time, the peak memory allocated while
+it ran (only when allocation tracing is on), the memory it left allocated
+and any HTML bytes it produced (set ``span.html_bytes``). Spans are kept
+per thread, so concurrent Streamlit sessions do not mix; when an outermost
+span finishes, one summary line is logged for the whole run and, with
+PROFILE_LOG set, the trace is appended to that file as one JSON line. The
+spans inside it are logged at DEBUG.
+
+Set PROFILE=1 to trace allocations (tracemalloc slows Python down, so it is
+off by default), to log every span at INFO and to log every trace to
+.store/profile.jsonl unless PROFILE_LOG says otherwise.
+"""
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+import uuid
+
+ENABLED = os.environ.get("PROFILE") == "1"
+LOG_PATH = os.environ.get("PROFILE_LOG") or (
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".store", "profile.jsonl") if ENABLED else None)
+
+logger = logging.getLogger("budget_myths.profile")
+
+# Spans inside a run are logged at this level; each run's summary at INFO
+SPAN_LEVEL = logging.INFO if ENABLED else logging.DEBUG
+
+if ENABLED and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+_local = threading.local()
+_log_lock = threading.Lock()
+
+
+def _stack():
+    if not hasattr(_local, "stack"):
+        _local.stack, _local.trace = [], []
+    return _local.stack
+
+
+def current():
+    """Spans finished so far in this thread's innermost open trace (or its last one)."""
+    _stack()
+    return list(_local.trace)
+
+
+class profile(contextlib.ContextDecorator):
+    """Time a block or function as a span called name."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def _recreate_cm(self):
+        # A fresh span per call, so decorated functions can run concurrently
+        return profile(self.name)
+
+    def __enter__(self):
+        stack = _stack()
+        if not stack:
+            _local.trace = []
+        self.html_bytes = None
+        self.depth = len(stack)
+        self.tracing = tracemalloc.is_tracing()
+        if self.tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1].peak_seen = max(stack[-1].peak_seen, peak)
+            tracemalloc.reset_peak()
+            self.start_memory, self.peak_seen = current, current
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        wall_ms = (time.perf_counter() - self.start) * 1000
+        stack = _stack()
+        stack.pop()
+        record = {"name": self.name, "depth": self.depth, "wall_ms": round(wall_ms, 3),
+                  "peak_kb": None, "net_kb": None, "html_bytes": self.html_bytes}
+        if self.tracing and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            peak = max(peak, self.peak_seen)
+            if stack:
+                stack[-1].peak_seen = max(stack[-1].peak_seen, peak)
+            record["peak_kb"] = round((peak - self.start_memory) / 1024, 1)
+            record["net_kb"] = round((current - self.start_memory) / 1024, 1)
+        _local.trace.append(record)
+
+        if stack:
+            details = f" ({self.html_bytes:,} HTML bytes)" if self.html_bytes is not None else ""
+            logger.log(SPAN_LEVEL, "%s ran in %.1f ms%s", self.name, wall_ms, details)
+        else:
+            html_bytes = sum(span["html_bytes"] or 0 for span in _local.trace)
+            logger.info("%s ran in %.1f ms (%d spans, %s HTML bytes)", self.name, wall_ms,
+                        len(_local.trace), f"{html_bytes:,}")
+            _write(_local.trace)
+        return False
+
+
+def _write(trace):
+    """Append a finished trace to LOG_PATH as one JSON line."""
+    if not LOG_PATH:
+        return
+    line = json.dumps({"run": uuid.uuid4().hex[:12], "time": time.time(), "spans": trace})
+    with _log_lock:
+        os.makedirs(os.path.dirname(LOG_PATH) or ".", exist_ok=True)
+        with open(LOG_PATH, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
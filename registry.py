@@ -0,0 +1,104 @@
+"""Process-wide registry of the read-only datasets every session shares.
+
+Datasets are loaded once per process and handed to every session as frozen,
+zero-copy views over the memory-mapped store (see store.py), so adding a
+session adds no copy of the data. Each dataset is registered under a name
+and a version (the source file's signature): asking for a newer version
+replaces the old one. The registry keeps the total size of its datasets
+under a budget by dropping the least recently used ones, so rarely viewed
+datasets such as other states' GDP or SOI partitions come and go while the
+ones on screen stay loaded.
+
+Set DATASET_BUDGET_MB to change the budget (default 256).
+"""
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from types import MappingProxyType
+
+import pandas as pd
+
+import calculator
+import ebf
+import gdp
+import store
+
+
+def _freeze(value):
+    if isinstance(value, pd.DataFrame):
+        return store.freeze(value)
+    if isinstance(value, Mapping):
+        return MappingProxyType({name: _freeze(v) for name, v in value.items()})
+    return value
+
+
+def nbytes(value):
+    """Memory a dataset (a frame or a mapping of frames) refers to."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, Mapping):
+        return sum(nbytes(v) for v in value.values())
+    return 0
+
+
+class Registry:
+    """Named, versioned read-only datasets, least recently used dropped past budget bytes."""
+
+    def __init__(self, budget):
+        self.budget = budget
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading = {}
+
+    def get(self, name, version, load):
+        """The dataset registered as name at version, loading it with load() if needed."""
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(name)
+                return entry[1]
+            loading = self._loading.setdefault(name, threading.Lock())
+
+        # One load per dataset at a time; other datasets keep being served
+        with loading:
+            with self._lock:
+                entry = self._entries.get(name)
+                if entry is not None and entry[0] == version:
+                    return entry[1]
+            value = _freeze(load())
+            with self._lock:
+                self._entries[name] = (version, value, nbytes(value))
+                self._entries.move_to_end(name)
+                self._evict()
+            return value
+
+    def _evict(self):
+        total = sum(size for _, _, size in self._entries.values())
+        while total > self.budget and len(self._entries) > 1:
+            _, (_, _, size) = self._entries.popitem(last=False)
+            total -= size
+
+    def stats(self):
+        """(name, version, bytes) of every registered dataset, least recently used first."""
+        with self._lock:
+            return [(name, version, size) for name, (version, _, size) in self._entries.items()]
+
+
+DATASETS = Registry(int(os.environ.get("DATASET_BUDGET_MB", 256)) * 2**20)
+
+
+# The app's datasets, versioned by their source file's signature
+def gdp_frames(state=gdp.DEFAULT_STATE):
+    """One state's derived GDP frames."""
+    return DATASETS.get(f"gdp/{state}", store.signature(gdp.csv_path(state)), lambda: gdp.load(state))
+
+
+def ebf_frames():
+    """The melted EBF frame."""
+    return DATASETS.get("ebf", store.signature(ebf.EBF_CSV), ebf.load)
+
+
+def rosters():
+    """Every year's billionaire roster."""
+    return DATASETS.get("roster", store.signature(calculator.ROSTER_CSV), calculator.load_roster)
@@ -0,0 +1,128 @@
+"""Headless runner for the "had the 2005 share held" counterfactual.
+
+tab1 projects state and local GDP as total GDP times the state and local
+share of GDP in 2005 Q1. This evaluates the same projection for any number
+of shares at once, either given directly or taken from baseline years, over
+any set of quarters, and writes the results to Parquet or CSV:
+
+    python scenarios.py --baseline-years 2005 2010 2015 --quarters Q1 Q3 --out baselines.csv
+    python scenarios.py --share-range 0.06 0.12 0.0001 --out sweep.parquet
+    python scenarios.py --state Ohio --out ohio.csv
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import gdp
+
+STATE_AND_LOCAL = "State and Local Governments"
+
+
+def baseline_shares(df, years, quarter="Q1"):
+    """State and local share of GDP in each baseline year, labelled by year and quarter."""
+    rows = df[(df["type"] == STATE_AND_LOCAL) & (df["quarter"] == quarter) & df["year"].isin(years)]
+    return pd.Series(rows["gdp_pct"].to_numpy(), index=[f"{y} {quarter}" for y in rows["year"]])
+
+
+def periods(df, quarters=("Q1",), years=None):
+    """Total and actual state and local GDP for every period the scenarios cover."""
+    total = df[df["type"] == "Private Sector"].set_index(["year", "quarter"])["total"]
+    actual = df[df["type"] == STATE_AND_LOCAL].set_index(["year", "quarter"])["gdp"]
+    frame = pd.DataFrame({"total": total, "actual": actual}).reset_index()
+    keep = frame["quarter"].isin(quarters)
+    if years is not None:
+        keep &= frame["year"].between(*years)
+    return frame[keep].reset_index(drop=True)
+
+
+def project(totals, actual, shares):
+    """Counterfactual GDP and its gap to actual, both shaped (shares, periods)."""
+    counterfactual = np.outer(shares, totals)
+    return counterfactual, counterfactual - actual[None, :]
+
+
+def _project_chunk(args):
+    return project(*args)
+
+
+def run(df, shares, quarters=("Q1",), years=None, workers=1):
+    """Long frame of every (scenario, period) pair.
+
+    shares is a Series of shares indexed by scenario label. With workers > 1
+    the scenarios are split across a process pool.
+    """
+    shares = pd.Series(shares, dtype=float)
+    grid = periods(df, quarters, years)
+    totals, actual = grid["total"].to_numpy(), grid["actual"].to_numpy()
+
+    if workers > 1 and len(shares) > workers:
+        chunks = np.array_split(shares.to_numpy(), workers)
+        with ProcessPoolExecutor(workers) as pool:
+            parts = list(pool.map(_project_chunk, [(totals, actual, chunk) for chunk in chunks]))
+        counterfactual = np.concatenate([p[0] for p in parts])
+        difference = np.concatenate([p[1] for p in parts])
+    else:
+        counterfactual, difference = project(totals, actual, shares.to_numpy())
+
+    n = len(grid)
+    return pd.DataFrame({
+        "scenario": np.repeat(shares.index.astype(str).to_numpy(), n),
+        "share": np.repeat(shares.to_numpy(), n),
+        "year": np.tile(grid["year"].to_numpy(), len(shares)),
+        "quarter": np.tile(grid["quarter"].to_numpy(), len(shares)),
+        "actual": np.tile(actual, len(shares)),
+        "counterfactual": counterfactual.ravel(),
+        "difference": difference.ravel(),
+    })
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--state", default=gdp.DEFAULT_STATE, help="state whose GDP partition to project")
+    parser.add_argument("--baseline-years", type=int, nargs="*", default=[], help="use the state and local share of these years")
+    parser.add_argument("--baseline-quarter", default="Q1", choices=gdp.QUARTERS, help="quarter the baseline shares are taken from")
+    parser.add_argument("--shares", type=float, nargs="*", default=[], help="explicit shares of GDP, e.g. 0.0844")
+    parser.add_argument("--share-range", type=float, nargs=3, metavar=("START", "STOP", "STEP"), help="sweep of shares (STOP excluded)")
+    parser.add_argument("--quarters", nargs="*", default=["Q1"], choices=gdp.QUARTERS, help="quarters to project (default: Q1, as in the app)")
+    parser.add_argument("--years", type=int, nargs=2, metavar=("FIRST", "LAST"), help="limit the projection to these years")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="processes to spread the scenarios over")
+    parser.add_argument("--out", default="scenarios.csv", help="output file, .parquet or .csv")
+    args = parser.parse_args(argv)
+
+    df = gdp.load(args.state)["gdp"]
+    shares = [baseline_shares(df, args.baseline_years, args.baseline_quarter)]
+    found = df.loc[(df["type"] == STATE_AND_LOCAL) & (df["quarter"] == args.baseline_quarter), "year"]
+    missing = sorted(set(args.baseline_years) - set(found))
+    if missing:
+        parser.error(f"no {args.state} State and Local row for {args.baseline_quarter} of "
+                     + ", ".join(map(str, missing)))
+    if args.shares:
+        shares.append(pd.Series(args.shares, index=[f"{s:g}" for s in args.shares]))
+    if args.share_range:
+        start, stop, step = args.share_range
+        if step <= 0:
+            parser.error("--share-range STEP must be positive")
+        # Counted in whole steps, as float arange can overshoot and include STOP
+        count = max(int(np.ceil(round((stop - start) / step, 9))), 0)
+        sweep = start + np.arange(count) * step
+        shares.append(pd.Series(sweep, index=[f"{s:g}" for s in sweep]))
+    shares = pd.concat(shares)
+    if shares.empty:
+        shares = pd.Series([gdp.baseline_share(df)], index=[" ".join(map(str, gdp.BASELINE))])
+
+    if periods(df, args.quarters, args.years).empty:
+        parser.error(f"no {args.state} periods for quarters {' '.join(args.quarters) or '(none)'}"
+                     + (f" in {args.years[0]}-{args.years[1]}" if args.years else ""))
+    results = run(df, shares, args.quarters, args.years, args.workers)
+    if args.out.endswith(".parquet"):
+        results.to_parquet(args.out, index=False)
+    else:
+        results.to_csv(args.out, index=False)
+    print(f"{len(shares)} scenarios x {len(results) // len(shares)} periods -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""IRS Statistics of Income (SOI) by state and AGI bracket.
+
+The raw extract has a leaked pandas index column, float years and a
+business_total column that is sometimes two numbers glued together (e.g.
+"-40096211-8670567"). load() reads it once with explicit dtypes, repairs it
+and caches the typed frame in the Arrow store, along with one partition per
+state so that a single state can be memory-mapped on its own (load_state()).
+
+Production extracts (every state and year, down to zip code) run to hundreds
+of MB, too big to parse in one go. aggregate() streams such a file instead:
+it parses only the grain and amount columns, a block at a time and across
+processes (see streaming.py), and sums each block to the (state, year,
+agi_stub_cat) grain SoiIndex works at as soon as it is parsed. load_totals()
+caches the result in the store and index() is built from it.
+
+Run ``python soi.py`` to build the store ahead of time, or
+``python soi.py --totals extract.csv`` to stream a large extract.
+"""
+import argparse
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+import store
+import streaming
+
+SOI_CSV = os.path.join(store.BASE_DIR, "data_soi.csv")
+
+# Bump when the parsing below changes so stale store entries get rebuilt
+VERSION = 2
+
+# agi_stub_cat in agi_stub order (0-10 are IRS brackets, 11-12 are derived groups)
+AGI_STUB_CATS = [
+    "No AGI Stub",
+    "Under $1",
+    "$1 under $10,000",
+    "$10,000 under $25,000",
+    "$25,000 under $50,000",
+    "$50,000 under $75,000",
+    "$75,000 under $100,000",
+    "$100,000 under $200,000",
+    "$200,000 under $500,000",
+    "$500,000 under $1,000,000",
+    "$1,000,000 or more",
+    "Top 1%",
+    "Bottom 50%",
+]
+
+AMOUNTS = ["returns", "agi", "wages", "dividends", "capital_gains"]
+
+# Amounts with precomputed per state/year/bracket aggregates
+MEASURES = ["agi", "wages", "dividends", "capital_gains"]
+
+# The bracket holding each state/year total
+TOTAL = "No AGI Stub"
+
+# The level SoiIndex sums amounts to
+GRAIN = ["state", "year", "agi_stub_cat"]
+
+DTYPES = {
+    "state": "category",
+    "agi_stub": "int8",
+    **{col: "float64" for col in AMOUNTS},
+    "business_total": "str",
+    "year": "float64",
+    "agi_stub_cat": pd.CategoricalDtype(AGI_STUB_CATS, ordered=True),
+}
+
+_NUMBER = re.compile(r"-?\d+")
+
+
+def repair_business_total(raw, agi):
+    """Parse business_total, summing values that were concatenated as text.
+
+    "-40096211-8670567" becomes -40096211 + -8670567. A run of digits with no
+    sign between the parts cannot be split back apart; those come out as
+    values far larger than the row's AGI and are set to NaN instead.
+    """
+    raw = raw.astype(str)
+    glued = raw.str.fullmatch(r"-?\d+(-\d+)+")
+    values = pd.to_numeric(raw.where(~glued), errors="coerce")
+    values[glued] = [sum(map(int, _NUMBER.findall(s))) for s in raw[glued]]
+    implausible = values.abs() > agi.abs().clip(lower=1) * 2
+    return values.mask(implausible).astype("float64")
+
+
+def parse(csv_path):
+    """Read the raw SOI extract into a typed frame."""
+    df = pd.read_csv(csv_path, usecols=list(DTYPES), dtype=DTYPES)
+    df["business_total"] = repair_business_total(df["business_total"], df["agi"])
+    df["year"] = df["year"].astype("int16")
+    return df[list(DTYPES)]
+
+
+def build(csv_path):
+    df = parse(csv_path)
+    partitions = {f"state_{state}": rows.reset_index(drop=True) for state, rows in df.groupby("state", observed=True)}
+    return {"soi": df, **partitions}
+
+
+def load(csv_path=SOI_CSV):
+    """Memory-map the typed SOI frame, rebuilding it if the CSV changed."""
+    return store.load("soi", csv_path, build, salt=VERSION, frames=["soi"])["soi"]
+
+
+def load_state(state, csv_path=SOI_CSV):
+    """Memory-map one state's partition of the SOI frame."""
+    return store.load("soi", csv_path, build, salt=VERSION, frames=[f"state_{state}"])[f"state_{state}"]
+
+
+def _totals(block):
+    block["year"] = block["year"].astype("int16")
+    return block.groupby(GRAIN, observed=True)[["returns"] + MEASURES].sum()
+
+
+def aggregate(csv_path=SOI_CSV, workers=1, block_size=streaming.BLOCK_SIZE):
+    """Stream the raw extract straight to per state/year/bracket totals.
+
+    Each block is summed as soon as it is parsed and folded into the running
+    totals, so memory holds one block per worker plus the totals, whatever
+    the size of the file. business_total is not summed, so it is never read.
+    """
+    columns = GRAIN + ["returns"] + MEASURES
+    # Blocks see different states, so the category is only made at the end
+    dtype = {col: DTYPES[col] for col in columns} | {"state": "str"}
+    # A header-only extract sums to no rows, typed like any other
+    totals = _totals(pd.DataFrame({col: pd.Series(dtype=dtype[col]) for col in columns}))
+    for part in streaming.map_chunks(csv_path, _totals, columns, dtype, block_size, workers):
+        totals = pd.concat([totals, part]).groupby(level=GRAIN, observed=True).sum()
+    totals = totals.sort_index().reset_index()
+    totals["state"] = totals["state"].astype("category")
+    return totals
+
+
+def build_totals(csv_path):
+    return {"totals": aggregate(csv_path, workers=os.cpu_count())}
+
+
+def load_totals(csv_path=SOI_CSV):
+    """Memory-map the per state/year/bracket totals, streaming them from the CSV if it changed."""
+    return store.load("soi_totals", csv_path, build_totals, salt=VERSION)["totals"]
+
+
+class SoiIndex:
+    """SOI data indexed for per-state/per-bracket slicing.
+
+    Amounts are summed once to the (state, year, agi_stub_cat) grain and kept
+    in a sorted MultiIndex, along with each bracket's share of its state/year
+    total. Queries never scan the data: the state's block is found through a
+    dict, the year range by binary search over the sorted years and the
+    brackets by their category codes, and the rows are taken by position.
+    """
+
+    def __init__(self, df):
+        totals = df.groupby(GRAIN, observed=True)[["returns"] + MEASURES].sum().sort_index()
+        state_year = totals.xs(TOTAL, level="agi_stub_cat")[MEASURES]
+        shares = totals[MEASURES].div(state_year.reindex(totals.index.droplevel("agi_stub_cat")).to_numpy())
+
+        self.totals = totals
+        self.shares = shares
+        self._states = {}
+        for state in totals.index.unique("state"):
+            block = totals.xs(state, level="state")
+            self._states[state] = (
+                block.index,
+                block.index.get_level_values("year").to_numpy(),
+                block.index.get_level_values("agi_stub_cat").codes,
+                {False: block.to_numpy(), True: shares.xs(state, level="state").to_numpy()},
+            )
+        self._columns = {False: list(totals.columns), True: list(shares.columns)}
+
+    @property
+    def states(self):
+        return list(self._states)
+
+    def query(self, state, brackets=None, years=None, measures=None, share=False):
+        """Amounts (or shares of the state total) for one state.
+
+        brackets is a list of agi_stub_cat labels, years a (first, last)
+        range, both inclusive; None means all. Returns a frame indexed by
+        (year, agi_stub_cat).
+        """
+        index, year_values, codes, values = self._states[state]
+        lo, hi = (0, len(year_values)) if years is None else (
+            np.searchsorted(year_values, years[0], "left"),
+            np.searchsorted(year_values, years[1], "right"),
+        )
+        rows = np.arange(lo, hi)
+        if brackets is not None:
+            wanted = [AGI_STUB_CATS.index(b) for b in brackets]
+            rows = rows[np.isin(codes[lo:hi], wanted)]
+        measures = measures or MEASURES
+        cols = [self._columns[share].index(m) for m in measures]
+        return pd.DataFrame(values[share][np.ix_(rows, cols)], index=index[rows], columns=measures)
+
+
+def index(csv_path=SOI_CSV):
+    """A SoiIndex over the cached SOI totals."""
+    return SoiIndex(load_totals(csv_path))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--totals", metavar="CSV", help="stream CSV to per state/year/bracket totals")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="processes to parse blocks with")
+    parser.add_argument("--block-mb", type=int, default=streaming.BLOCK_SIZE >> 20, help="size of the blocks parsed at a time")
+    args = parser.parse_args(argv)
+
+    if args.totals:
+        totals = aggregate(args.totals, args.workers, args.block_mb << 20)
+        print(f"soi totals: {len(totals)} rows, {totals['state'].nunique()} states, "
+              f"years {totals['year'].min()}-{totals['year'].max()}")
+        return
+    df = load()
+    print(f"soi: {len(df)} rows, {df['state'].nunique()} states, "
+          f"{df['business_total'].isna().sum()} unrecoverable business_total values")
+    print(df.dtypes.to_string())
+
+
+if __name__ == "__main__":
+    main()
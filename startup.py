@@ -0,0 +1,90 @@
+"""Cold start: warm the data and chart caches before the first session arrives.
+
+    python startup.py                          # warm the on-disk caches and report timings
+    python startup.py serve [streamlit args]   # run the app, warming up in-process at boot
+
+Streamlit only runs app.py when a session connects, so a fresh replica
+normally pays for its imports, CSV parsing and chart building on its first
+visitor. ``serve`` starts the server through Streamlit's own command line,
+with warm() running in a background thread: by the time a visitor arrives
+the shared dataset registry, the rendered-chart memo and the render cache
+are full, and the first rerun costs what any other does. Run on its own,
+warm() still fills the on-disk store and render cache, which a later
+``streamlit run app.py`` picks up.
+
+Both report how long each import and warm-up step took.
+"""
+import importlib
+import logging
+import os
+import sys
+import threading
+import time
+
+import profiling
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+# Imports the first session would otherwise pay for, heaviest first
+HEAVY_IMPORTS = ["ipyvizzu", "pandas", "pyarrow.feather", "pyarrow.compute", "streamlit_extras.stylable_container"]
+
+logger = logging.getLogger("budget_myths.startup")
+
+
+def warm():
+    """Import, load and render everything the first full run needs; return the timings."""
+    with profiling.profile("warm-up"):
+        for module in HEAVY_IMPORTS:
+            with profiling.profile(f"import {module}"):
+                importlib.import_module(module)
+
+        import figures
+        import gdp
+        import registry
+
+        with profiling.profile("load datasets"):
+            frames = {**registry.gdp_frames(), **registry.ebf_frames()}
+            registry.rosters()
+        for name, chart in figures.charts_for(gdp.DEFAULT_STATE).items():
+            with profiling.profile(f"render {name}") as span:
+                span.html_bytes = len(figures.render(name, frames[chart["frame"]], gdp.DEFAULT_STATE).encode("utf-8"))
+    return profiling.current()
+
+
+def report(spans):
+    """Log the time each import and warm-up step took (nested spans are in the profile log)."""
+    for span in spans:
+        if span["depth"] <= 1:
+            logger.info("%s%s: %.1f ms", "  " * span["depth"], span["name"], span["wall_ms"])
+
+
+def _warm_in_background():
+    try:
+        report(warm())
+    except Exception:
+        logger.exception("warm-up failed; sessions will load and render on demand")
+
+
+def serve(args):
+    """Run ``streamlit run app.py args`` in this process, warming up alongside it."""
+    from streamlit.web import cli
+
+    start = time.perf_counter()
+    threading.Thread(target=_warm_in_background, name="warm-up", daemon=True).start()
+    logger.info("warm-up started %.1f ms after launch", (time.perf_counter() - start) * 1000)
+    sys.argv = ["streamlit", "run", APP, *args]
+    return cli.main()
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["serve"]:
+        logging.basicConfig(level=logging.INFO, format="%(message)s")
+        return serve(argv[1:])
+    logging.basicConfig(level=logging.WARNING, format="%(message)s")
+    logger.setLevel(logging.INFO)
+    report(warm())
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+"""Content-hashed Arrow store for frames derived from the bundled CSVs.
+
+Each source file is turned into a set of finished frames once per version of
+its contents. The frames live in ``.store/<name>/<version>/<frame>.arrow`` as
+uncompressed Arrow IPC files so they can be memory-mapped on load. Loaded
+frames are zero-copy views: numeric columns point straight into the mapped
+file and string columns stay Arrow-backed, so the data is shared through the
+OS page cache rather than copied onto the Python heap.
+"""
+import functools
+import hashlib
+import inspect
+import os
+import shutil
+
+import pandas as pd
+import pyarrow.feather as feather
+
+import profiling
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STORE_DIR = os.path.join(BASE_DIR, ".store")
+
+
+class _ReadOnlyIndexer:
+    """Wraps .loc/.iloc/.at/.iat so reads work and writes raise."""
+
+    def __init__(self, indexer):
+        self._indexer = indexer
+
+    def __getitem__(self, key):
+        return self._indexer[key]
+
+    def __setitem__(self, key, value):
+        FrozenFrame._read_only()
+
+
+class FrozenFrame(pd.DataFrame):
+    """DataFrame shared by every rerun and session that refuses in-place changes.
+
+    Filtering, slicing, .copy() and friends return ordinary DataFrames, so a
+    tab that needs extra columns builds its own frame instead of mutating the
+    shared one.
+    """
+
+    @property
+    def _constructor(self):
+        return pd.DataFrame
+
+    @staticmethod
+    def _read_only(*args, **kwargs):
+        raise TypeError("shared data frames are read-only; take a .copy() before modifying one")
+
+    __setitem__ = __delitem__ = insert = pop = _update_inplace = _read_only
+
+    def __setattr__(self, name, value):
+        if name in ("columns", "index") or name in getattr(self, "columns", ()):
+            self._read_only()
+        super().__setattr__(name, value)
+
+    @property
+    def loc(self):
+        return _ReadOnlyIndexer(super().loc)
+
+    @property
+    def iloc(self):
+        return _ReadOnlyIndexer(super().iloc)
+
+    @property
+    def at(self):
+        return _ReadOnlyIndexer(super().at)
+
+    @property
+    def iat(self):
+        return _ReadOnlyIndexer(super().iat)
+
+
+def _refuse_inplace(method):
+    @functools.wraps(method)
+    def guarded(self, *args, **kwargs):
+        if kwargs.get("inplace"):
+            FrozenFrame._read_only()
+        return method(self, *args, **kwargs)
+    return guarded
+
+
+# Every method that can write in place (fillna, replace, where, mask, clip, ...)
+# writes before pandas gets to _update_inplace, so inplace=True is refused up front
+for _name in dir(pd.DataFrame):
+    _method = getattr(pd.DataFrame, _name)
+    if not _name.startswith("_") and inspect.isfunction(_method) and "inplace" in inspect.signature(_method).parameters:
+        setattr(FrozenFrame, _name, _refuse_inplace(_method))
+# update() has no inplace flag: it always writes into the frame
+FrozenFrame.update = FrozenFrame._read_only
+
+
+def freeze(df):
+    """Wrap df as a FrozenFrame without copying its data."""
+    return FrozenFrame(df, copy=False)
+
+
+def file_hash(path, salt="", appended=b""):
+    """Short sha256 digest of a file's contents (plus an optional salt).
+
+    appended is hashed as if it were written to the end of the file, which
+    gives the version the file will have once it is.
+    """
+    h = hashlib.sha256(str(salt).encode())
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    h.update(appended)
+    return h.hexdigest()[:16]
+
+
+def signature(path):
+    """Cheap (mtime, size) stamp used to notice that a source file changed."""
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def write_frames(frames, name, version):
+    """Write a dict of frames as one store entry and drop older versions."""
+    root = os.path.join(STORE_DIR, name)
+    path = os.path.join(root, version)
+    # Per process, so two processes storing the same version never share one
+    tmp = f"{path}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    for key, df in frames.items():
+        feather.write_feather(df.reset_index(drop=True), os.path.join(tmp, f"{key}.arrow"), compression="uncompressed")
+    shutil.rmtree(path, ignore_errors=True)
+    try:
+        os.replace(tmp, path)
+    except OSError:
+        # Another process stored this version in the meantime; it holds the same frames
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    # Only the current version is ever read
+    for entry in os.listdir(root):
+        if entry != version:
+            shutil.rmtree(os.path.join(root, entry), ignore_errors=True)
+    return path
+
+
+def read_frames(path, names=None):
+    """Memory-map the frames of a store entry (all of them, or just names).
+
+    split_blocks keeps every column its own block, which lets pandas wrap the
+    mapped buffers instead of consolidating them into fresh arrays.
+    """
+    names = [f[:-len(".arrow")] for f in sorted(os.listdir(path)) if f.endswith(".arrow")] if names is None else names
+    return {
+        name: feather.read_table(os.path.join(path, f"{name}.arrow"), memory_map=True).to_pandas(split_blocks=True)
+        for name in names
+    }
+
+
+def put(name, source, frames, salt="", appended=b""):
+    """Store frames as the entry load() would build from source once appended is written to its end."""
+    return write_frames(frames, name, file_hash(source, salt, appended))
+
+
+def load(name, source, build, salt="", frames=None):
+    """Return the frames built from source, building the store entry if it is missing or stale.
+
+    build(source) must return a dict of DataFrames. The entry is keyed by a
+    hash of the source contents and salt, so editing the CSV (or bumping the
+    salt when the derivations change) rebuilds it automatically. frames
+    limits what is read to those names.
+    """
+    with profiling.profile(f"store {name}"):
+        version = file_hash(source, salt)
+        path = os.path.join(STORE_DIR, name, version)
+        if not os.path.isdir(path):
+            with profiling.profile(f"build {name}"):
+                write_frames(build(source), name, version)
+        return read_frames(path, frames)
@@ -0,0 +1,67 @@
+"""Bounded-memory, parallel reading of large CSV extracts.
+
+A file is cut into byte ranges of about block_size bytes, each ending on a
+line break. Every range is parsed on its own, keeping only the columns
+asked for. chunks() yields the parsed ranges one at a time; map_chunks()
+hands each one to a reduce function as soon as it is parsed, in a process
+pool when workers > 1. So at most one range per worker is held in memory,
+however large the file is. Rows must not contain quoted line breaks, which
+holds for the SOI and BEA extracts.
+"""
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import pandas as pd
+
+BLOCK_SIZE = 16 << 20
+
+
+def ranges(path, block_size=BLOCK_SIZE):
+    """The header line and the (start, end) byte offsets of every block after it."""
+    with open(path, "rb") as f:
+        header = f.readline()
+        size = os.fstat(f.fileno()).st_size
+        start, spans = f.tell(), []
+        while start < size:
+            f.seek(min(start + block_size, size))
+            f.readline()
+            end = min(f.tell(), size)
+            spans.append((start, end))
+            start = end
+    return header, spans
+
+
+def _parse(path, header, usecols, dtype, span):
+    start, end = span
+    with open(path, "rb") as f:
+        f.seek(start)
+        body = f.read(end - start)
+    return pd.read_csv(io.BytesIO(header + body), usecols=usecols, dtype=dtype)
+
+
+def _parse_and_reduce(reduce, path, header, usecols, dtype, span):
+    return reduce(_parse(path, header, usecols, dtype, span))
+
+
+def chunks(path, usecols=None, dtype=None, block_size=BLOCK_SIZE):
+    """Parse path one block at a time."""
+    header, spans = ranges(path, block_size)
+    for span in spans:
+        yield _parse(path, header, usecols, dtype, span)
+
+
+def map_chunks(path, reduce, usecols=None, dtype=None, block_size=BLOCK_SIZE, workers=1):
+    """reduce(block) for every block of path, in file order.
+
+    With workers > 1 the blocks are parsed and reduced in a process pool, so
+    reduce must be picklable (a module-level function or a partial of one).
+    """
+    header, spans = ranges(path, block_size)
+    task = partial(_parse_and_reduce, reduce, path, header, usecols, dtype)
+    if workers > 1 and len(spans) > 1:
+        with ProcessPoolExecutor(min(workers, len(spans))) as pool:
+            yield from pool.map(task, spans)
+    else:
+        yield from map(task, spans)